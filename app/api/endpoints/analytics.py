@@ -0,0 +1,131 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Security
+from sqlalchemy import func, true
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db
+from app.core.money import from_minor
+from app.db.snapshot import snapshot_cache
+from app.models.aggregate import CategoryBalance, MerchantTotal
+from app.models.category import Category
+from app.models.user import User
+from app.schemas.analytics import Summary, TopSpending
+from app.models.enums import TransactionType
+
+router = APIRouter()
+
+def _in_period(model, period: Optional[str]):
+    if period is None:
+        return true()
+    if len(period) == 4:
+        return model.period.like(f"{period}-%")
+    return model.period == period
+
+@router.get("/top", response_model=TopSpending, summary="Top categories and merchants")
+def read_top(
+    db: Session = Depends(get_db),
+    period: Optional[str] = Query(None, regex=r"^\d{4}(-\d{2})?$"),
+    type: TransactionType = TransactionType.expense,
+    limit: int = Query(5, ge=1, le=50),
+    current_user: User = Security(get_current_user, scopes=[]),
+) -> Any:
+    """
+    Top-N categories and top-N merchants (normalized descriptions) by total.
+
+    - **period**: `YYYY` or `YYYY-MM`; all time when omitted
+    - **type**: income or expense, defaults to expense
+    - **limit**: Number of entries in each list
+    """
+    category_total = func.sum(CategoryBalance.total_minor).label("total")
+    categories = (
+        db.query(
+            CategoryBalance.category_id,
+            Category.name,
+            category_total,
+            func.sum(CategoryBalance.count).label("count"),
+        )
+        .outerjoin(Category, Category.id == CategoryBalance.category_id)
+        .filter(
+            CategoryBalance.user_id == current_user.id,
+            CategoryBalance.type == type,
+            CategoryBalance.count > 0,
+            _in_period(CategoryBalance, period),
+        )
+        .group_by(CategoryBalance.category_id, Category.name)
+        .order_by(category_total.desc())
+        .limit(limit)
+        .all()
+    )
+    merchant_total = func.sum(MerchantTotal.total_minor).label("total")
+    merchants = (
+        db.query(
+            MerchantTotal.merchant,
+            merchant_total,
+            func.sum(MerchantTotal.count).label("count"),
+        )
+        .filter(
+            MerchantTotal.user_id == current_user.id,
+            MerchantTotal.type == type,
+            MerchantTotal.count > 0,
+            _in_period(MerchantTotal, period),
+        )
+        .group_by(MerchantTotal.merchant)
+        .order_by(merchant_total.desc())
+        .limit(limit)
+        .all()
+    )
+    return {
+        "period": period,
+        "type": type,
+        "categories": [
+            {**row._asdict(), "total": from_minor(row.total)} for row in categories
+        ],
+        "merchants": [
+            {**row._asdict(), "total": from_minor(row.total)} for row in merchants
+        ],
+    }
+
+@router.get("/summary", response_model=Summary, summary="Income and expense summary")
+def read_summary(
+    db: Session = Depends(get_db),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    current_user: User = Security(get_current_user, scopes=[]),
+) -> Any:
+    """
+    Income, expense and per-category totals of the current user.
+
+    Computed from the user's columnar ledger snapshot, which is refreshed
+    from the change log before reading.
+
+    - **start**: First day to include; from the beginning when omitted
+    - **end**: Last day to include; up to now when omitted
+    """
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    snapshot = snapshot_cache.get(db, current_user.id)
+    summary = snapshot.summary(
+        datetime.combine(start, time.min) if start else None,
+        # The day after date.max does not exist; that range is open-ended anyway
+        datetime.combine(end + timedelta(days=1), time.min) if end and end < date.max else None,
+    )
+    return {
+        "start": start,
+        "end": end,
+        "count": summary["count"],
+        "income": from_minor(summary["income"]),
+        "expense": from_minor(summary["expense"]),
+        "net": from_minor(summary["income"] - summary["expense"]),
+        "categories": [
+            {
+                "category_id": category_id,
+                "income": from_minor(income),
+                "expense": from_minor(expense),
+                "count": count,
+            }
+            for category_id, (income, expense, count) in sorted(
+                summary["categories"].items(), key=lambda item: -item[1][1]
+            )
+        ],
+    }
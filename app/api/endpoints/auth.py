@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
+from app.core.audit import audit_log
 from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
 from app.api.deps import get_db, create_access_token
@@ -14,21 +15,26 @@ router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 @router.post("/token", response_model=Token, summary="Login to get access token")
-async def login_for_access_token(
+def login_for_access_token(
     db: Session = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
+
+    A plain function on purpose: password hashing, the query and a blocking
+    audit enqueue run in the threadpool instead of stalling the event loop.
     """
     user = db.query(User).filter(User.email == form_data.username).first()
     if not user or not verify_password(form_data.password, user.hashed_password):
+        audit_log.record("auth.login_failed", subject=form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    audit_log.record("auth.login", user_id=user.id, subject=user.email)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
@@ -60,4 +66,5 @@ def register_user(
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    audit_log.record("auth.register", user_id=db_user.id, subject=db_user.email)
     return db_user 
\ No newline at end of file
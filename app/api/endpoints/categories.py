@@ -1,8 +1,10 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, Security, HTTPException
+from fastapi import APIRouter, Depends, Request, Security, HTTPException
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user, get_db
+from app.core.audit import audit_log
+from app.core.cache import response_cache
 from app.models.user import User
 from app.models.category import Category as CategoryModel
 from app.schemas.category import Category as CategorySchema
@@ -12,14 +14,22 @@ router = APIRouter()
 
 @router.get("/", response_model=List[CategorySchema], summary="List all categories")
 def read_categories(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Security(get_current_user, scopes=[]),
 ) -> Any:
     """
     Retrieve all categories.
     """
-    categories = db.query(CategoryModel).all()
-    return categories  # FastAPI will automatically convert to schema using orm_mode 
+    key = response_cache.key_for(current_user.id, request)
+    cached = response_cache.get(key)
+    if cached is None:
+        categories = db.query(CategoryModel).all()
+        cached = response_cache.put(
+            key,
+            [CategorySchema.from_orm(category) for category in categories],
+        )
+    return cached.to_response(request)
 
 @router.post("/", response_model=CategorySchema, summary="Create new category")
 def create_category(
@@ -43,4 +53,7 @@ def create_category(
     db.add(category)
     db.commit()
     db.refresh(category)
+    # Categories are shared by all users, so every cached list is stale now
+    response_cache.invalidate_all()
+    audit_log.record("category.create", user_id=current_user.id, category_id=category.id)
     return category 
\ No newline at end of file
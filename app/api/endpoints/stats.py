@@ -0,0 +1,34 @@
+from typing import Any
+from fastapi import APIRouter, Security
+
+from app.api.deps import get_current_admin
+from app.core.audit import audit_log
+from app.core.ratelimit import concurrency_limiter, rate_limiter
+from app.models.user import User
+
+router = APIRouter()
+
+@router.get("/ratelimit", summary="Rate limiter statistics")
+def read_rate_limit_stats(
+    current_user: User = Security(get_current_admin, scopes=[]),
+) -> Any:
+    """
+    Token bucket and load shedding counters, for tuning the limits in Settings.
+
+    Process-wide numbers, so only users in `ADMIN_EMAILS` may read them.
+    """
+    return {
+        "rate_limit": rate_limiter.stats(),
+        "concurrency": concurrency_limiter.stats(),
+    }
+
+@router.get("/audit", summary="Audit pipeline statistics")
+def read_audit_stats(
+    current_user: User = Security(get_current_admin, scopes=[]),
+) -> Any:
+    """
+    Queue depth, write lag and dropped/failed event counters of the audit writer.
+
+    Process-wide numbers, so only users in `ADMIN_EMAILS` may read them.
+    """
+    return audit_log.stats()
@@ -1,19 +1,31 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, Security
+import time
+from typing import Any, AsyncIterator, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Security
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, joinedload
 
 from app.api.deps import get_current_user, get_db
+from app.core.audit import audit_log
+from app.core.cache import response_cache
+from app.core.changefeed import change_notifier
+from app.core.idempotency import idempotency_store
+from app.db.aggregates import apply_transaction
+from app.db.changes import read_changes, record_change
 from app.models.user import User
 from app.models.transaction import Transaction
 from app.schemas.transaction import Transaction as TransactionSchema
 from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.schemas.change import ChangeFeed
+from app.schemas.change import TransactionChange as TransactionChangeSchema
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 @router.get("/", response_model=List[TransactionSchema], summary="List all transactions")
 def read_transactions(
+    request: Request,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
@@ -24,23 +36,105 @@ def read_transactions(
 
     - **skip**: Number of transactions to skip (pagination)
     - **limit**: Maximum number of transactions to return
+
+    Responses carry an ETag; send it back in `If-None-Match` to get a 304.
     """
-    transactions = (
-        db.query(Transaction)
-        .options(joinedload(Transaction.category))
-        .filter(Transaction.user_id == current_user.id)
-        .order_by(Transaction.date.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    return transactions
+    key = response_cache.key_for(current_user.id, request)
+    cached = response_cache.get(key)
+    if cached is None:
+        transactions = (
+            db.query(Transaction)
+            .options(joinedload(Transaction.category))
+            .filter(Transaction.user_id == current_user.id)
+            .order_by(Transaction.date.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        cached = response_cache.put(
+            key,
+            [TransactionSchema.from_orm(transaction) for transaction in transactions],
+        )
+    return cached.to_response(request)
+
+def _parse_since(token: Optional[str]) -> int:
+    if not token:
+        return 0
+    try:
+        return int(token)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid since token")
+
+async def _stream_changes(
+    db: Session, user_id: int, since: int, limit: int, duration: float
+) -> AsyncIterator[str]:
+    deadline = time.monotonic() + duration
+    while True:
+        seen = change_notifier.version(user_id)
+        feed = await run_in_threadpool(read_changes, db, user_id, since, limit)
+        await run_in_threadpool(db.rollback)
+        if feed is not None:
+            for change in feed["changes"]:
+                event = TransactionChangeSchema(**change)
+                yield f"id: {event.seq}\nevent: change\ndata: {event.json()}\n\n"
+            since = int(feed["next"])
+            if feed["has_more"]:
+                continue
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        if not await change_notifier.wait_async(user_id, seen, remaining):
+            yield ": keepalive\n\n"
+
+@router.get("/changes", response_model=ChangeFeed, summary="Transaction change feed")
+async def read_transaction_changes(
+    request: Request,
+    db: Session = Depends(get_db),
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=1000),
+    wait: float = Query(0, ge=0, le=60),
+    current_user: User = Security(get_current_user, scopes=[]),
+) -> Any:
+    """
+    Creates, updates and deletes of the current user's transactions since a sync token.
+
+    - **since**: `next` token of the previous response; omit for a full sync
+    - **limit**: Maximum number of changes to return
+    - **wait**: Seconds to long-poll when there are no changes yet
+
+    With `Accept: text/event-stream` changes are pushed as Server-Sent Events
+    for `wait` seconds (30 when not given), resuming after `Last-Event-ID`.
+    Waiting happens on the event loop: queries run in the threadpool, but no
+    thread or database connection is held in between.
+    """
+    user_id = current_user.id
+    since_seq = _parse_since(request.headers.get("last-event-id") or since)
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _stream_changes(db, user_id, since_seq, limit, wait or 30),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache"},
+        )
+
+    deadline = time.monotonic() + wait
+    while True:
+        seen = change_notifier.version(user_id)
+        feed = await run_in_threadpool(read_changes, db, user_id, since_seq, limit)
+        remaining = deadline - time.monotonic()
+        if feed is not None or remaining <= 0:
+            break
+        # Release the connection while waiting and see fresh data afterwards
+        await run_in_threadpool(db.rollback)
+        await change_notifier.wait_async(user_id, seen, remaining)
+    return feed or {"changes": [], "next": str(since_seq), "has_more": False}
 
 @router.post("/", response_model=TransactionSchema, summary="Create new transaction")
 def create_transaction(
     *,
+    request: Request,
     db: Session = Depends(get_db),
     transaction_in: TransactionCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     current_user: User = Security(get_current_user, scopes=[]),
 ) -> Any:
     """
@@ -51,14 +145,37 @@ def create_transaction(
     - **description**: Transaction description (required)
     - **currency**: Currency code, defaults to USD
     - **category_id**: ID of the category (required)
+
+    Retries sent with the same `Idempotency-Key` header replay the original
+    response instead of creating another transaction.
     """
+    if idempotency_key:
+        fingerprint = idempotency_store.fingerprint("POST", request.url.path, transaction_in)
+        replay = idempotency_store.lookup(db, current_user.id, idempotency_key, fingerprint)
+        if replay is not None:
+            return replay
+
     transaction = Transaction(
         **transaction_in.dict(),
         user_id=current_user.id
     )
     db.add(transaction)
-    db.commit()
+    db.flush()
     db.refresh(transaction)
+    apply_transaction(db, transaction)
+    record_change(db, transaction, "create")
+    if idempotency_key:
+        stored = idempotency_store.save(
+            db, current_user.id, idempotency_key, fingerprint, TransactionSchema.from_orm(transaction)
+        )
+        replay = idempotency_store.commit(db, current_user.id, idempotency_key, stored)
+        if replay is not None:
+            return replay
+    else:
+        db.commit()
+    response_cache.invalidate_user(current_user.id)
+    change_notifier.notify(current_user.id)
+    audit_log.record("transaction.create", user_id=current_user.id, transaction_id=transaction.id)
     
     # Reload the transaction with category
     transaction = (
@@ -72,9 +189,11 @@ def create_transaction(
 @router.put("/{transaction_id}", response_model=TransactionSchema, summary="Update transaction")
 def update_transaction(
     *,
+    request: Request,
     db: Session = Depends(get_db),
     transaction_id: int,
     transaction_in: TransactionUpdate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     current_user: User = Security(get_current_user, scopes=[]),
 ) -> Any:
     """
@@ -86,7 +205,17 @@ def update_transaction(
     - **description**: New description (optional)
     - **currency**: New currency (optional)
     - **category_id**: New category ID (optional)
+
+    Supports the `Idempotency-Key` header like transaction creation.
     """
+    if idempotency_key:
+        fingerprint = idempotency_store.fingerprint(
+            "PUT", request.url.path, transaction_in.dict(exclude_unset=True)
+        )
+        replay = idempotency_store.lookup(db, current_user.id, idempotency_key, fingerprint)
+        if replay is not None:
+            return replay
+
     transaction = (
         db.query(Transaction)
         .options(joinedload(Transaction.category))
@@ -96,12 +225,33 @@ def update_transaction(
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
+    apply_transaction(db, transaction, sign=-1)
     for field, value in transaction_in.dict(exclude_unset=True).items():
         setattr(transaction, field, value)
     
     db.add(transaction)
-    db.commit()
+    apply_transaction(db, transaction)
+    record_change(db, transaction, "update")
+    if idempotency_key:
+        db.flush()
+        db.refresh(transaction)
+        stored = idempotency_store.save(
+            db, current_user.id, idempotency_key, fingerprint, TransactionSchema.from_orm(transaction)
+        )
+        replay = idempotency_store.commit(db, current_user.id, idempotency_key, stored)
+        if replay is not None:
+            return replay
+    else:
+        db.commit()
     db.refresh(transaction)
+    response_cache.invalidate_user(current_user.id)
+    change_notifier.notify(current_user.id)
+    audit_log.record(
+        "transaction.update",
+        user_id=current_user.id,
+        transaction_id=transaction_id,
+        fields=sorted(transaction_in.dict(exclude_unset=True)),
+    )
     
     # Reload the transaction with category
     transaction = (
@@ -132,6 +282,11 @@ def delete_transaction(
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
+    apply_transaction(db, transaction, sign=-1)
+    record_change(db, transaction, "delete")
     db.delete(transaction)
     db.commit()
+    response_cache.invalidate_user(current_user.id)
+    change_notifier.notify(current_user.id)
+    audit_log.record("transaction.delete", user_id=current_user.id, transaction_id=transaction_id)
     return {"status": "success"} 
\ No newline at end of file
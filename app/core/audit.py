@@ -0,0 +1,281 @@
+import asyncio
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, List, Optional
+
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BACKPRESSURE_POLICIES = ("block", "drop_new", "drop_oldest")
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class AuditSink:
+    """Destination of audit event batches."""
+
+    def write(self, events: List[dict]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class DatabaseSink(AuditSink):
+    """Writes each batch with a single multi-row insert into ``audit_events``."""
+
+    def __init__(self, engine: Engine) -> None:
+        from app.models.audit import AuditEvent
+
+        self.engine = engine
+        self.table = AuditEvent.__table__
+
+    def write(self, events: List[dict]) -> None:
+        rows = [
+            {
+                "created_at": datetime.utcfromtimestamp(event["ts"]),
+                "action": event["action"],
+                "user_id": event["user_id"],
+                "subject": event["subject"],
+                "details": json.dumps(event["details"], default=str),
+            }
+            for event in events
+        ]
+        with self.engine.begin() as conn:
+            conn.execute(self.table.insert(), rows)
+
+
+class NdjsonSink(AuditSink):
+    """
+    Appends events as JSON lines to segment files in ``directory``.
+
+    A new segment is started once the current one exceeds ``segment_bytes``;
+    closed segments are never modified again.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 16 * 1024 * 1024) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._file = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _segment(self):
+        if self._file is None or self._file.tell() >= self.segment_bytes:
+            if self._file is not None:
+                self._file.close()
+            name = "audit-%s-%d.ndjson" % (datetime.utcnow().strftime("%Y%m%dT%H%M%S%f"), os.getpid())
+            self._file = open(os.path.join(self.directory, name), "a", encoding="utf-8")
+        return self._file
+
+    def write(self, events: List[dict]) -> None:
+        segment = self._segment()
+        segment.write("".join(json.dumps(event, default=str) + "\n" for event in events))
+        segment.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class AuditLog:
+    """
+    Bounded in-process queue of audit events drained by a background writer.
+
+    ``record`` only appends to a deque, so the request path never waits for
+    the sink. The writer thread collects up to ``batch_size`` events or waits
+    ``flush_interval`` seconds, whichever comes first, and hands the batch to
+    the sink. When the queue is full the ``policy`` decides: ``block`` waits
+    up to ``block_timeout`` for room, ``drop_new`` discards the incoming event
+    and ``drop_oldest`` evicts the oldest queued one. Every lost event is
+    counted in ``stats()``. On an event loop thread ``block`` never waits and
+    behaves like ``drop_new``, so a coroutine can't stall the loop.
+    """
+
+    def __init__(
+        self,
+        sink_factory: Callable[[], AuditSink],
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        policy: str = "block",
+        block_timeout: float = 0.05,
+        enabled: bool = True,
+    ) -> None:
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown audit backpressure policy: {policy}")
+        self.sink_factory = sink_factory
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.enabled = enabled
+
+        self._events: Deque[dict] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._unwritten = 0
+        self._atexit_registered = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_write_lag = 0.0
+
+    def record(
+        self,
+        action: str,
+        user_id: Optional[int] = None,
+        subject: Optional[str] = None,
+        **details,
+    ) -> bool:
+        """Queue an event. Returns False if it was dropped because of backpressure."""
+        if not self.enabled:
+            return False
+        event = {
+            "ts": time.time(),
+            "action": action,
+            "user_id": user_id,
+            "subject": subject,
+            "details": details,
+        }
+        if self._thread is None:
+            self.start()
+        with self._cond:
+            if len(self._events) >= self.max_queue:
+                if self.policy == "drop_oldest":
+                    self._events.popleft()
+                    self._unwritten -= 1
+                    self.dropped += 1
+                elif self.policy == "block" and not _in_event_loop():
+                    self._cond.wait_for(
+                        lambda: len(self._events) < self.max_queue, timeout=self.block_timeout
+                    )
+                if len(self._events) >= self.max_queue:
+                    self.dropped += 1
+                    return False
+            self._events.append(event)
+            self._unwritten += 1
+            self.enqueued += 1
+            self._cond.notify_all()
+        return True
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, args=(self.sink_factory(),), name="audit-writer", daemon=True
+            )
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Write all queued events and stop the writer thread."""
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        thread.join(timeout)
+        with self._cond:
+            self._thread = None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event has been handed to the sink."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._unwritten == 0, timeout=timeout)
+
+    def _run(self, sink: AuditSink) -> None:
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._events or self._stopping)
+                    if not self._events:
+                        return
+                    self._cond.wait_for(
+                        lambda: len(self._events) >= self.batch_size or self._stopping,
+                        timeout=self.flush_interval,
+                    )
+                    batch = [
+                        self._events.popleft()
+                        for _ in range(min(self.batch_size, len(self._events)))
+                    ]
+                    self._cond.notify_all()
+                try:
+                    sink.write(batch)
+                    ok = True
+                except Exception:
+                    logger.exception("Failed to write %d audit events", len(batch))
+                    ok = False
+                with self._cond:
+                    if ok:
+                        self.written += len(batch)
+                        self.batches += 1
+                        self.last_write_lag = time.time() - batch[0]["ts"]
+                    else:
+                        self.failed += len(batch)
+                    self._unwritten -= len(batch)
+                    self._cond.notify_all()
+        finally:
+            sink.close()
+
+    def stats(self) -> dict:
+        with self._cond:
+            oldest = self._events[0]["ts"] if self._events else None
+            return {
+                "enabled": self.enabled,
+                "running": self._thread is not None,
+                "policy": self.policy,
+                "queue_depth": len(self._events),
+                "queue_capacity": self.max_queue,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "batches": self.batches,
+                "lag_seconds": time.time() - oldest if oldest else 0.0,
+                "last_write_lag_seconds": self.last_write_lag,
+            }
+
+
+def _default_sink() -> AuditSink:
+    if settings.AUDIT_SINK == "ndjson":
+        return NdjsonSink(settings.AUDIT_NDJSON_DIR, settings.AUDIT_SEGMENT_BYTES)
+    from app.db.session import engine
+
+    return DatabaseSink(engine)
+
+
+audit_log = AuditLog(
+    _default_sink,
+    max_queue=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL,
+    policy=settings.AUDIT_BACKPRESSURE,
+    block_timeout=settings.AUDIT_BLOCK_TIMEOUT,
+    enabled=settings.AUDIT_ENABLED,
+)
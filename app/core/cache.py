@@ -0,0 +1,227 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+
+
+class CacheBackend:
+    """Key/value store shared between workers (e.g. Redis or memcached)."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """In-process stand-in for a shared backend."""
+
+    def __init__(self) -> None:
+        self._data: Dict[str, bytes] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        expires_at = self._expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            return None
+        return self._data.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self._data[key] = value
+        if ttl:
+            self._expires[key] = time.monotonic() + ttl
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._data.get(key, b"0")) + 1
+            self._data[key] = str(value).encode()
+            return value
+
+
+class RedisBackend(CacheBackend):
+    """Shared backend on Redis; needs the optional ``redis`` package."""
+
+    def __init__(self, url: str) -> None:
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(key)
+
+
+def backend_from_url(url: Optional[str]) -> Optional[CacheBackend]:
+    if not url:
+        return None
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported response cache backend: {url}")
+
+
+class CachedResponse:
+    """A serialized JSON payload together with its ETag."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes, etag: Optional[str] = None) -> None:
+        self.body = body
+        self.etag = etag or '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+    def to_response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and self.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+    def dumps(self) -> bytes:
+        return self.etag.encode() + b"\n" + self.body
+
+    @classmethod
+    def loads(cls, data: bytes) -> "CachedResponse":
+        etag, body = data.split(b"\n", 1)
+        return cls(body, etag.decode())
+
+
+class ResponseCache:
+    """
+    LRU cache of rendered list responses keyed by (user, route, query params).
+
+    Every key embeds the user's version counter and a global version counter,
+    so bumping either makes all older entries unreachable at once; stale
+    entries are then evicted by the LRU bound. When a shared ``backend`` is
+    given, version counters and entries live there and the local LRU only
+    acts as a first-level cache.
+
+    Without a backend the version counters are per process, so a write
+    handled by another worker is not seen here; ``ttl_seconds`` bounds how
+    long such an entry can be served. Entries expire after ``ttl_seconds``
+    in either case (``None`` disables expiry).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        backend: Optional[CacheBackend] = None,
+        enabled: bool = True,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.backend = backend
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[CachedResponse, float]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _version(self, name: str) -> int:
+        if self.backend is not None:
+            return int(self.backend.get(name) or 0)
+        return self._versions.get(name, 0)
+
+    def _bump(self, name: str) -> None:
+        if self.backend is not None:
+            self.backend.incr(name)
+        else:
+            with self._lock:
+                self._versions[name] = self._versions.get(name, 0) + 1
+
+    def key_for(self, user_id: int, request: Request) -> str:
+        """
+        Cache key of a request under the current versions.
+
+        Take it before reading the data and pass the same key to ``put``: a
+        write that commits in between bumps the version, so the rows read
+        before it are stored under a key that is already unreachable.
+        """
+        query = "&".join(sorted(str(request.query_params).split("&")))
+        return "%s:%d:%d:%s?%s" % (
+            user_id,
+            self._version("version:user:%s" % user_id),
+            self._version("version:global"),
+            request.url.path,
+            query,
+        )
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                entry, expires_at = cached
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+                del self._entries[key]
+        if self.backend is not None:
+            data = self.backend.get("entry:" + key)
+            if data is not None:
+                entry = CachedResponse.loads(data)
+                self._store_local(key, entry)
+                self.hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    def put(self, key: str, content: Any) -> CachedResponse:
+        body = json.dumps(jsonable_encoder(content), separators=(",", ":")).encode()
+        entry = CachedResponse(body)
+        if self.enabled:
+            self._store_local(key, entry)
+            if self.backend is not None:
+                self.backend.set("entry:" + key, entry.dumps(), self.ttl_seconds)
+        return entry
+
+    def _store_local(self, key: str, entry: CachedResponse) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else float("inf")
+        with self._lock:
+            self._entries[key] = (entry, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached response of a single user."""
+        self._bump("version:user:%s" % user_id)
+
+    def invalidate_all(self) -> None:
+        """Drop every cached response, e.g. after a change to shared data."""
+        self._bump("version:global")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    backend=backend_from_url(settings.RESPONSE_CACHE_BACKEND_URL),
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+
+class ChangeNotifier:
+    """
+    Wakes up long-poll and streaming change feed readers of a user.
+
+    Notifications only reach readers in the same process; readers therefore
+    also re-check the database at least every ``poll_interval`` seconds to
+    pick up writes made by other workers. ``notify`` is called from request
+    threads, so event loop readers (``wait_async``) are woken through
+    ``call_soon_threadsafe``.
+    """
+
+    def __init__(self, poll_interval: float = 1.0) -> None:
+        self.poll_interval = poll_interval
+        self._versions: Dict[int, int] = defaultdict(int)
+        self._condition = threading.Condition()
+        self._async_waiters: Dict[int, List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = (
+            defaultdict(list)
+        )
+
+    def version(self, user_id: int) -> int:
+        return self._versions[user_id]
+
+    def notify(self, user_id: int) -> None:
+        with self._condition:
+            self._versions[user_id] += 1
+            self._condition.notify_all()
+            waiters = self._async_waiters.pop(user_id, [])
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def wait(self, user_id: int, seen: int, timeout: float) -> bool:
+        """Block until ``user_id`` changes past version ``seen``. Returns False on timeout."""
+        timeout = min(timeout, self.poll_interval)
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._versions[user_id] != seen, timeout=max(timeout, 0)
+            )
+
+    async def wait_async(self, user_id: int, seen: int, timeout: float) -> bool:
+        """Like ``wait``, but suspends the coroutine instead of blocking a thread."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._condition:
+            if self._versions[user_id] != seen:
+                return True
+            self._async_waiters[user_id].append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), max(min(timeout, self.poll_interval), 0))
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._condition:
+                waiters = self._async_waiters.get(user_id)
+                if waiters and waiter in waiters:
+                    waiters.remove(waiter)
+                    if not waiters:
+                        del self._async_waiters[user_id]
+
+
+change_notifier = ChangeNotifier()
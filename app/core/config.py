@@ -1,5 +1,5 @@
 from pydantic import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 import os
 
 class Settings(BaseSettings):
@@ -8,12 +8,59 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     
     DATABASE_URL: str = "sqlite:///./finance_tracker.db"
+    # Migrate and seed in the startup hook. Every worker runs it, so with more
+    # than one worker turn it off and run `python -m app.db.init` once instead
+    MIGRATE_ON_STARTUP: bool = True
     SECRET_KEY: str = "your-secret-key-here"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Users allowed to read the operational /api/v1/stats endpoints, e.g. '["ops@example.com"]'
+    ADMIN_EMAILS: List[str] = []
+    # bcrypt work factor (log2 rounds); tests lower it to the minimum of 4
+    BCRYPT_ROUNDS: int = 12
     
     EXCHANGE_RATE_API_KEY: Optional[str] = None
 
+    # Response cache for list endpoints
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    # Without a shared backend every worker has its own invalidation counters,
+    # so another worker's writes show up only once an entry expires
+    RESPONSE_CACHE_TTL_SECONDS: float = 5.0
+    # Shared store for version counters and entries, e.g. "redis://localhost:6379/0"
+    RESPONSE_CACHE_BACKEND_URL: Optional[str] = None
+
+    # Idempotency-Key replay window for transaction writes
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+
+    # Admission control: token buckets as (tokens per second, burst)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_USER_RATE: float = 20.0
+    RATE_LIMIT_USER_BURST: int = 100
+    RATE_LIMIT_IP_RATE: float = 50.0
+    RATE_LIMIT_IP_BURST: int = 200
+    # Per-user limits for "METHOD /path-prefix", e.g. '{"GET /api/v1/transactions/": [5, 20]}'
+    RATE_LIMIT_ROUTES: Dict[str, Tuple[float, int]] = {
+        "GET /api/v1/transactions/": (10.0, 50),
+    }
+    # In-flight request cap; keep at or below the SQLAlchemy pool size + overflow
+    MAX_CONCURRENT_REQUESTS: int = 15
+
+    # Audit trail, written in batches by a background thread
+    AUDIT_ENABLED: bool = True
+    AUDIT_SINK: str = "database"  # "database" or "ndjson"
+    AUDIT_NDJSON_DIR: str = "./audit_log"
+    AUDIT_SEGMENT_BYTES: int = 16 * 1024 * 1024
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL: float = 0.5
+    AUDIT_BACKPRESSURE: str = "block"  # "block", "drop_new" or "drop_oldest"
+    AUDIT_BLOCK_TIMEOUT: float = 0.05
+
+    # Memory-mapped columnar ledger snapshots used by analytics
+    SNAPSHOT_DIR: str = "./snapshots"
+
     class Config:
         env_file = ".env"
         case_sensitive = True
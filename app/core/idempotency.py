@@ -0,0 +1,175 @@
+import calendar
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+
+
+class StoredResponse:
+    """A response recorded for an idempotency key."""
+
+    __slots__ = ("fingerprint", "status_code", "body", "expires_at")
+
+    def __init__(self, fingerprint: str, status_code: int, body: str, expires_at: float) -> None:
+        self.fingerprint = fingerprint
+        self.status_code = status_code
+        self.body = body
+        self.expires_at = expires_at
+
+    def to_response(self) -> Response:
+        return Response(
+            content=self.body,
+            status_code=self.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"},
+        )
+
+
+class IdempotencyStore:
+    """
+    Deduplicates retried writes that carry an ``Idempotency-Key`` header.
+
+    Responses are kept in a TTL-bounded in-memory LRU in front of the
+    ``idempotency_keys`` table, which makes replays work across workers.
+    The table row is added to the caller's session so it commits atomically
+    with the write it describes.
+    """
+
+    def __init__(self, ttl_seconds: int = 24 * 60 * 60, max_entries: int = 10000) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, str], StoredResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._saves = 0
+
+    @staticmethod
+    def fingerprint(method: str, path: str, payload: Any) -> str:
+        body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{method} {path} {body}".encode()).hexdigest()
+
+    def lookup(
+        self, db: Session, user_id: int, key: str, fingerprint: str
+    ) -> Optional[Response]:
+        """
+        Return the stored response for a replayed key, or None for a new key.
+
+        Raises 422 when the key was already used for a different request.
+        """
+        stored = self._get_local(user_id, key)
+        if stored is None:
+            row = (
+                db.query(IdempotencyKey)
+                .filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+                .first()
+            )
+            # created_at is naive UTC; the replay window is counted from it
+            expires_at = (
+                calendar.timegm(row.created_at.utctimetuple()) + self.ttl_seconds if row else 0
+            )
+            if expires_at > time.time():
+                stored = StoredResponse(row.fingerprint, row.status_code, row.response, expires_at)
+                self._put_local(user_id, key, stored)
+        if stored is None:
+            return None
+        if stored.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request",
+            )
+        return stored.to_response()
+
+    def save(
+        self,
+        db: Session,
+        user_id: int,
+        key: str,
+        fingerprint: str,
+        content: Any,
+        status_code: int = 200,
+    ) -> StoredResponse:
+        """Record a response in the caller's session; pass the result to ``commit``."""
+        body = json.dumps(jsonable_encoder(content))
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        # An expired row for the same key would violate the unique constraint
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.created_at <= cutoff,
+        ).delete(synchronize_session=False)
+        with self._lock:
+            self._saves += 1
+            purge = self._saves % 100 == 0
+        if purge:
+            db.query(IdempotencyKey).filter(
+                IdempotencyKey.created_at <= cutoff
+            ).delete(synchronize_session=False)
+        db.add(
+            IdempotencyKey(
+                user_id=user_id,
+                key=key,
+                fingerprint=fingerprint,
+                status_code=status_code,
+                response=body,
+            )
+        )
+        return StoredResponse(fingerprint, status_code, body, time.time() + self.ttl_seconds)
+
+    def commit(
+        self, db: Session, user_id: int, key: str, stored: StoredResponse
+    ) -> Optional[Response]:
+        """
+        Commit a write recorded with ``save``.
+
+        If a concurrent request with the same key committed first, the write
+        is rolled back and that request's response is returned instead.
+        """
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            replay = self.lookup(db, user_id, key, stored.fingerprint)
+            if replay is None:
+                raise
+            return replay
+        self._put_local(user_id, key, stored)
+        return None
+
+    def _get_local(self, user_id: int, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            stored = self._entries.get((user_id, key))
+            if stored is None:
+                return None
+            if stored.expires_at <= time.time():
+                del self._entries[(user_id, key)]
+                return None
+            self._entries.move_to_end((user_id, key))
+            return stored
+
+    def _put_local(self, user_id: int, key: str, stored: StoredResponse) -> None:
+        with self._lock:
+            self._entries[(user_id, key)] = stored
+            self._entries.move_to_end((user_id, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_entries=settings.IDEMPOTENCY_CACHE_SIZE,
+)
@@ -0,0 +1,38 @@
+"""
+Fixed-point money arithmetic.
+
+Amounts are stored as integers in minor units (cents) and only converted to
+``Decimal`` at the API boundary. Columns of amounts are kept in ``array('q')``
+buffers (contiguous int64, 8 bytes per row). Sums over them are exact and run
+in a single C-level loop, but each element is still boxed into a short-lived
+Python int as it is read; nothing here is vectorized.
+"""
+from array import array
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import compress
+from typing import Iterable, Union
+
+SCALE = 100
+QUANTUM = Decimal("0.01")
+
+def to_minor(amount: Union[Decimal, float, int, str]) -> int:
+    """Convert an amount in major units to integer minor units, rounding half up."""
+    if not isinstance(amount, Decimal):
+        amount = Decimal(str(amount))
+    return int((amount * SCALE).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def from_minor(minor: int) -> Decimal:
+    """Convert integer minor units back to a two-place ``Decimal``."""
+    return (Decimal(minor) / SCALE).quantize(QUANTUM)
+
+def column(values: Iterable[int] = ()) -> array:
+    """Pack minor-unit amounts into a contiguous int64 column."""
+    return array("q", values)
+
+def sum_minor(values: Iterable[int]) -> int:
+    """Exact sum of a column of minor-unit amounts."""
+    return sum(values)
+
+def sum_where(values: Iterable[int], mask: Iterable[int]) -> int:
+    """Exact sum of the amounts whose mask entry is truthy."""
+    return sum(compress(values, mask))
@@ -0,0 +1,220 @@
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Optional, Tuple
+
+from jose import JWTError, jwt
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, up to ``burst`` tokens."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """Take one token. Returns 0 on success, else the seconds until one is available."""
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Per-key token buckets with an LRU bound on the number of tracked keys.
+
+    Keys are ``user:<jwt sub>`` and ``ip:<client address>``, suffixed with the
+    route prefix when the route has its own limits in ``RATE_LIMIT_ROUTES``.
+    """
+
+    def __init__(
+        self,
+        user_limit: Tuple[float, int],
+        ip_limit: Tuple[float, int],
+        routes: Optional[Dict[str, Tuple[float, int]]] = None,
+        max_keys: int = 100000,
+    ) -> None:
+        self.user_limit = user_limit
+        self.ip_limit = ip_limit
+        self.routes = routes or {}
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected: Dict[str, int] = defaultdict(int)
+
+    def route_for(self, method: str, path: str) -> Optional[str]:
+        """Longest configured "METHOD /prefix" rule matching the request."""
+        request_line = f"{method} {path}"
+        matches = [route for route in self.routes if request_line.startswith(route)]
+        return max(matches, key=len) if matches else None
+
+    def check(self, method: str, path: str, subject: Optional[str], ip: str) -> float:
+        """Charge the request to its buckets. Returns 0 if allowed, else Retry-After seconds."""
+        route = self.route_for(method, path)
+        user_limit = self.routes[route] if route else self.user_limit
+        suffix = f"|{route}" if route else ""
+        checks = [("ip", f"ip:{ip}", self.ip_limit)]
+        if subject:
+            checks.append(("user", f"user:{subject}{suffix}", user_limit))
+
+        now = time.monotonic()
+        with self._lock:
+            for scope, key, (rate, burst) in checks:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = TokenBucket(rate, burst)
+                    if len(self._buckets) > self.max_keys:
+                        self._buckets.popitem(last=False)
+                else:
+                    self._buckets.move_to_end(key)
+                wait = bucket.take(now)
+                if wait:
+                    self.rejected[scope] += 1
+                    return wait
+            self.allowed += 1
+        return 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "buckets": len(self._buckets),
+                "allowed": self.allowed,
+                "rejected": dict(self.rejected),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+            self.allowed = 0
+            self.rejected.clear()
+
+
+class ConcurrencyLimiter:
+    """Caps in-flight requests so excess load is shed before the DB pool runs dry."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.in_flight = 0
+        self.peak = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self.limit and self.in_flight >= self.limit:
+                self.shed += 1
+                return False
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self.in_flight,
+                "peak": self.peak,
+                "shed": self.shed,
+            }
+
+
+def _subject(scope: Scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            except JWTError:
+                return None
+            return payload.get("sub")
+    return None
+
+
+class RateLimitMiddleware:
+    """
+    Admission control for every HTTP request.
+
+    Requests over their token bucket get ``429`` and requests beyond the
+    concurrency limit get ``503``, both with a ``Retry-After`` header.
+    Paths starting with one of ``exempt_paths`` (long-polls and streams that
+    wait without holding a thread or connection) are rate limited but don't
+    take a concurrency slot.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: RateLimiter,
+        concurrency: ConcurrencyLimiter,
+        enabled: bool = True,
+        exempt_paths: Tuple[str, ...] = (),
+    ) -> None:
+        self.app = app
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.enabled = enabled
+        self.exempt_paths = tuple(exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        wait = self.limiter.check(
+            scope["method"], scope["path"], _subject(scope), client[0] if client else "unknown"
+        )
+        if wait:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests"},
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+
+        if self.exempt_paths and scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        if not self.concurrency.acquire():
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Server is busy, please retry"},
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.concurrency.release()
+
+
+rate_limiter = RateLimiter(
+    user_limit=(settings.RATE_LIMIT_USER_RATE, settings.RATE_LIMIT_USER_BURST),
+    ip_limit=(settings.RATE_LIMIT_IP_RATE, settings.RATE_LIMIT_IP_BURST),
+    routes=settings.RATE_LIMIT_ROUTES,
+)
+concurrency_limiter = ConcurrencyLimiter(settings.MAX_CONCURRENT_REQUESTS)
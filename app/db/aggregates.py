@@ -0,0 +1,132 @@
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.aggregate import CategoryBalance, MerchantTotal
+from app.models.transaction import Transaction
+
+# Reference numbers: "#123" anywhere, and bare numbers at the end ("Bus 42")
+_REFERENCE = re.compile(r"#\s*\d*|\*+|(\s+\d+)+\s*$")
+_SPACES = re.compile(r"\s+")
+
+def normalize_description(description: Optional[str]) -> str:
+    """
+    Collapse a free-text description into a merchant key ("AMAZON #123 " -> "amazon").
+
+    Digits that are part of the name ("7-Eleven") are kept, and a description
+    that is nothing but a reference ("12345") is used as is.
+    """
+    text = _SPACES.sub(" ", (description or "").lower()).strip()
+    merchant = _SPACES.sub(" ", _REFERENCE.sub(" ", text)).strip()
+    return (merchant or text)[:64]
+
+def period_of(date: Optional[datetime]) -> str:
+    """Monthly bucket a transaction is aggregated into."""
+    return (date or datetime.utcnow()).strftime("%Y-%m")
+
+def _update(db: Session, model, key: dict, amount_minor: int, count: int) -> int:
+    return (
+        db.query(model)
+        .filter_by(**key)
+        .update(
+            {
+                model.total_minor: model.total_minor + amount_minor,
+                model.count: model.count + count,
+            },
+            synchronize_session=False,
+        )
+    )
+
+def _add(db: Session, model, key: dict, amount_minor: int, count: int) -> None:
+    if _update(db, model, key, amount_minor, count):
+        return
+    try:
+        # Savepoint, so losing the race below doesn't abort the caller's transaction
+        with db.begin_nested():
+            db.add(model(**key, total_minor=amount_minor, count=count))
+    except IntegrityError:
+        # A concurrent first write to the same bucket committed the row first
+        _update(db, model, key, amount_minor, count)
+
+def apply_transaction(db: Session, transaction: Transaction, sign: int = 1) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) a transaction from the aggregate tables.
+
+    Must run inside the same unit of work as the write it mirrors, so the
+    aggregates commit or roll back together with the transaction row.
+    """
+    period = period_of(transaction.date)
+    amount_minor = sign * (transaction.amount_minor or 0)
+    _add(
+        db,
+        CategoryBalance,
+        {
+            "user_id": transaction.user_id,
+            "period": period,
+            "type": transaction.type,
+            "category_id": transaction.category_id,
+        },
+        amount_minor,
+        sign,
+    )
+    _add(
+        db,
+        MerchantTotal,
+        {
+            "user_id": transaction.user_id,
+            "period": period,
+            "type": transaction.type,
+            "merchant": normalize_description(transaction.description),
+        },
+        amount_minor,
+        sign,
+    )
+
+def rebuild_aggregates(db: Session, batch_size: int = 5000) -> int:
+    """Recompute both aggregate tables from scratch. Returns the number of transactions read."""
+    categories: Dict[Tuple, list] = defaultdict(lambda: [0, 0])
+    merchants: Dict[Tuple, list] = defaultdict(lambda: [0, 0])
+    rows = (
+        db.query(
+            Transaction.user_id,
+            Transaction.date,
+            Transaction.type,
+            Transaction.category_id,
+            Transaction.description,
+            Transaction.amount_minor,
+        )
+        .yield_per(batch_size)
+    )
+    count = 0
+    for user_id, date, type_, category_id, description, amount_minor in rows:
+        period = period_of(date)
+        for bucket in (
+            categories[(user_id, period, type_, category_id)],
+            merchants[(user_id, period, type_, normalize_description(description))],
+        ):
+            bucket[0] += amount_minor or 0
+            bucket[1] += 1
+        count += 1
+
+    db.query(CategoryBalance).delete(synchronize_session=False)
+    db.query(MerchantTotal).delete(synchronize_session=False)
+    db.bulk_insert_mappings(
+        CategoryBalance,
+        [
+            {"user_id": u, "period": p, "type": t, "category_id": c, "total_minor": total, "count": n}
+            for (u, p, t, c), (total, n) in categories.items()
+        ],
+    )
+    db.bulk_insert_mappings(
+        MerchantTotal,
+        [
+            {"user_id": u, "period": p, "type": t, "merchant": m, "total_minor": total, "count": n}
+            for (u, p, t, m), (total, n) in merchants.items()
+        ],
+    )
+    db.commit()
+    return count
@@ -1,4 +1,9 @@
+# Model registry: import every model here so Base.metadata knows all tables
 from app.db.base_class import Base
 from app.models.user import User
 from app.models.transaction import Transaction
-from app.models.category import Category 
\ No newline at end of file
+from app.models.category import Category
+from app.models.aggregate import CategoryBalance, MerchantTotal
+from app.models.idempotency import IdempotencyKey
+from app.models.change import TransactionChange
+from app.models.audit import AuditEvent
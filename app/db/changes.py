@@ -0,0 +1,59 @@
+from typing import List, Optional
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.change import TransactionChange
+from app.models.transaction import Transaction
+
+def record_change(db: Session, transaction: Transaction, op: str) -> None:
+    """Append a change log entry in the same unit of work as the mutation."""
+    db.add(
+        TransactionChange(
+            user_id=transaction.user_id,
+            transaction_id=transaction.id,
+            op=op,
+        )
+    )
+
+def read_changes(db: Session, user_id: int, since: int, limit: int) -> Optional[dict]:
+    """
+    Collapse the log entries after ``since`` into the latest state per transaction.
+
+    Returns None when there are no changes. Transactions that no longer exist
+    are reported as tombstones, whatever their last logged operation was.
+    """
+    entries: List[TransactionChange] = (
+        db.query(TransactionChange)
+        .filter(TransactionChange.user_id == user_id, TransactionChange.id > since)
+        .order_by(TransactionChange.id)
+        .limit(limit + 1)
+        .all()
+    )
+    if not entries:
+        return None
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {entry.transaction_id: entry for entry in entries}
+    live = {
+        transaction.id: transaction
+        for transaction in (
+            db.query(Transaction)
+            .options(joinedload(Transaction.category))
+            .filter(Transaction.user_id == user_id, Transaction.id.in_(list(latest)))
+            .all()
+        )
+    }
+    changes = []
+    for entry in sorted(latest.values(), key=lambda entry: entry.id):
+        transaction = live.get(entry.transaction_id)
+        changes.append(
+            {
+                "seq": entry.id,
+                "op": entry.op if transaction is not None else "delete",
+                "transaction_id": entry.transaction_id,
+                "transaction": transaction,
+                "changed_at": entry.created_at,
+            }
+        )
+    return {"changes": changes, "next": str(entries[-1].id), "has_more": has_more}
@@ -1,10 +1,29 @@
-from app.db.session import SessionLocal
+import argparse
+
+from app.db.session import SessionLocal, engine
 from app.db.init_db import init_db
+from app.db.aggregates import rebuild_aggregates
+from app.db.migrations import run_migrations
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Initialize the database.")
+    parser.add_argument(
+        "--rebuild-aggregates",
+        action="store_true",
+        help="Recompute category balances and merchant totals from all transactions",
+    )
+    args = parser.parse_args()
+
+    run_migrations(engine)
     db = SessionLocal()
-    init_db(db)
+    try:
+        init_db(db)
+        print("Database initialized successfully!")
+        if args.rebuild_aggregates:
+            count = rebuild_aggregates(db)
+            print(f"Rebuilt aggregates from {count} transactions.")
+    finally:
+        db.close()
 
 if __name__ == "__main__":
     main()
-    print("Database initialized successfully!") 
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Idempotent schema migrations for databases created before a model change.
+
+``Base.metadata.create_all`` only creates missing tables, so column changes
+to existing tables are applied here. Every migration inspects the live schema
+first and is a no-op once applied.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base, CategoryBalance, MerchantTotal, TransactionChange
+
+def _columns(conn: Connection, table: str) -> set:
+    inspector = inspect(conn)
+    if not inspector.has_table(table):
+        return set()
+    return {column["name"] for column in inspector.get_columns(table)}
+
+def normalize_transaction_types(conn: Connection) -> None:
+    """Rows written through the legacy enum were stored as INCOME/EXPENSE."""
+    if _columns(conn, "transactions"):
+        conn.execute(text(
+            "UPDATE transactions SET type = LOWER(type) WHERE type IN ('INCOME', 'EXPENSE')"
+        ))
+
+def amount_to_minor_units(conn: Connection) -> None:
+    """Store transaction amounts as integer cents instead of floats."""
+    columns = _columns(conn, "transactions")
+    if columns and "amount_minor" not in columns:
+        conn.execute(text("ALTER TABLE transactions ADD COLUMN amount_minor BIGINT NOT NULL DEFAULT 0"))
+        if "amount" in columns:
+            conn.execute(text(
+                "UPDATE transactions SET amount_minor = CAST(ROUND(amount * 100) AS BIGINT) "
+                "WHERE amount IS NOT NULL"
+            ))
+
+    # The aggregate tables are derived data: (re)create and fill them when they
+    # are missing on a database with transactions, or still hold float totals
+    balances = _columns(conn, "category_balances")
+    if columns and (not balances or "total" in balances):
+        from app.db.aggregates import rebuild_aggregates
+
+        tables = [CategoryBalance.__table__, MerchantTotal.__table__]
+        Base.metadata.drop_all(bind=conn, tables=tables)
+        Base.metadata.create_all(bind=conn, tables=tables)
+        rebuild_aggregates(Session(bind=conn))
+
+def change_log(conn: Connection) -> None:
+    """Track updated_at and seed the change log with the existing transactions."""
+    columns = _columns(conn, "transactions")
+    if not columns:
+        return
+    if "updated_at" not in columns:
+        conn.execute(text("ALTER TABLE transactions ADD COLUMN updated_at DATETIME"))
+        conn.execute(text("UPDATE transactions SET updated_at = date"))
+    if not _columns(conn, "transaction_changes"):
+        Base.metadata.create_all(bind=conn, tables=[TransactionChange.__table__])
+        conn.execute(text(
+            "INSERT INTO transaction_changes (user_id, transaction_id, op, created_at) "
+            "SELECT user_id, id, 'create', date FROM transactions "
+            "WHERE user_id IS NOT NULL ORDER BY id"
+        ))
+
+MIGRATIONS = [
+    normalize_transaction_types,
+    amount_to_minor_units,
+    change_log,
+]
+
+def run_migrations(engine: Engine) -> None:
+    """Create missing tables and bring existing ones up to date."""
+    with engine.begin() as conn:
+        for migration in MIGRATIONS:
+            migration(conn)
+        Base.metadata.create_all(bind=conn)
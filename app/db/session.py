@@ -1,3 +1,4 @@
+from typing import Generator
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -8,7 +9,8 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
+def get_db() -> Generator:
+    """Request-scoped session; tests override this dependency."""
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,284 @@
+"""
+Columnar, memory-mapped snapshot of a user's ledger.
+
+A snapshot file holds one contiguous array per column, rows sorted by
+(date, id):
+
+    header      magic, format version, row count, change-log position, build time
+    ids         int64[n]
+    dates       int64[n]   seconds since the epoch (UTC)
+    amounts     int64[n]   minor units
+    categories  int64[n]   category id, -1 when missing
+    types       int8[n]    1 for income, 0 for expense
+
+Readers map the file and scan ``memoryview`` slices of it, so analytical
+queries never hydrate ORM objects. ``refresh_snapshot`` brings a snapshot up
+to date by replaying the transaction change log since the stored position.
+"""
+import bisect
+import calendar
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.money import sum_minor, sum_where
+from app.models.change import TransactionChange
+from app.models.enums import TransactionType
+from app.models.transaction import Transaction
+
+MAGIC = b"FTSNAP01"
+VERSION = 1
+HEADER = struct.Struct("<8sIIqq")  # 32 bytes, keeps the int64 columns aligned
+# Beyond this many changed rows a refresh rebuilds instead of inserting in place
+MAX_PATCHED_ROWS = 1000
+
+Row = Tuple[int, int, int, int, int]  # id, date, amount, category, type
+
+_COLUMNS: List[Tuple[str, str]] = [
+    ("ids", "q"),
+    ("dates", "q"),
+    ("amounts", "q"),
+    ("categories", "q"),
+    ("types", "b"),
+]
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _epoch(date: Optional[datetime]) -> int:
+    return calendar.timegm(date.utctimetuple()) if date else 0
+
+
+class LedgerSnapshot:
+    """Read-only view over a memory-mapped snapshot file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise SnapshotError(f"{path} is truncated")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.since, self.built_at = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise SnapshotError(f"{path} is not a version {VERSION} ledger snapshot")
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        for name, typecode in _COLUMNS:
+            width = array(typecode).itemsize * self.count
+            if offset + width > size:
+                view.release()
+                self._mmap.close()
+                raise SnapshotError(f"{path} is truncated")
+            setattr(self, name, view[offset:offset + width].cast(typecode))
+            offset += width
+
+    def close(self) -> None:
+        for name, _ in _COLUMNS:
+            getattr(self, name).release()
+        self._mmap.close()
+
+    def rows(self) -> Iterable[Row]:
+        return zip(self.ids, self.dates, self.amounts, self.categories, self.types)
+
+    def bounds(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Tuple[int, int]:
+        """Row range [lo, hi) with start <= date < end; empty when end <= start."""
+        lo = bisect.bisect_left(self.dates, _epoch(start)) if start else 0
+        hi = bisect.bisect_left(self.dates, _epoch(end)) if end else self.count
+        return lo, max(hi, lo)
+
+    def summary(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> dict:
+        """
+        Income, expense and per-category totals (minor units) in a date range.
+
+        The income/expense sums are single C-level passes over the slices; the
+        per-category breakdown is a plain Python loop over the rows in range
+        and is the dominant cost for wide ranges.
+        """
+        lo, hi = self.bounds(start, end)
+        amounts = self.amounts[lo:hi]
+        types = self.types[lo:hi]
+        income = sum_where(amounts, types)
+        expense = sum_minor(amounts) - income
+
+        categories: Dict[int, List[int]] = defaultdict(lambda: [0, 0, 0])
+        for category_id, amount, is_income in zip(self.categories[lo:hi], amounts, types):
+            totals = categories[category_id]
+            totals[0 if is_income else 1] += amount
+            totals[2] += 1
+        return {
+            "count": hi - lo,
+            "income": income,
+            "expense": expense,
+            "categories": {
+                (None if category_id < 0 else category_id): totals
+                for category_id, totals in categories.items()
+            },
+        }
+
+
+def snapshot_path(user_id: int) -> str:
+    return os.path.join(settings.SNAPSHOT_DIR, f"user_{user_id}.snap")
+
+
+def _write_columns(path: str, columns: List[array], since: int) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(columns[0]), since, int(time.time())))
+        for column in columns:
+            column.tofile(f)
+    # Readers that still map the old file keep a consistent view of it
+    os.replace(tmp, path)
+
+
+def _write(path: str, rows: List[Row], since: int) -> None:
+    columns = [array(typecode) for _, typecode in _COLUMNS]
+    for row in rows:
+        for column, value in zip(columns, row):
+            column.append(value)
+    _write_columns(path, columns, since)
+
+
+def _load_rows(db: Session, user_id: int, ids: Optional[Iterable[int]] = None) -> List[Row]:
+    query = db.query(
+        Transaction.id,
+        Transaction.date,
+        Transaction.amount_minor,
+        Transaction.category_id,
+        Transaction.type,
+    ).filter(Transaction.user_id == user_id)
+    if ids is not None:
+        query = query.filter(Transaction.id.in_(list(ids)))
+    return [
+        (
+            id_,
+            _epoch(date),
+            amount_minor or 0,
+            -1 if category_id is None else category_id,
+            1 if type_ == TransactionType.income else 0,
+        )
+        for id_, date, amount_minor, category_id, type_ in query
+    ]
+
+
+def _log_position(db: Session, user_id: int) -> int:
+    return (
+        db.query(func.max(TransactionChange.id))
+        .filter(TransactionChange.user_id == user_id)
+        .scalar()
+        or 0
+    )
+
+
+def build_snapshot(db: Session, user_id: int) -> LedgerSnapshot:
+    """Write a user's snapshot from scratch."""
+    # Read the log position first: writes racing with the scan are replayed later
+    since = _log_position(db, user_id)
+    rows = _load_rows(db, user_id)
+    rows.sort(key=lambda row: (row[1], row[0]))
+    path = snapshot_path(user_id)
+    _write(path, rows, since)
+    return LedgerSnapshot(path)
+
+
+def refresh_snapshot(db: Session, user_id: int) -> LedgerSnapshot:
+    """
+    Bring a user's snapshot up to date with the change log.
+
+    Only the transactions changed since the snapshot's log position are read
+    from the database. The file is rewritten from byte copies of the mapped
+    columns: changed rows are filtered out and the fresh versions inserted at
+    their sorted positions, which is an append for new, later rows. Only
+    updates and deletes need a pass over the ids to find the old versions.
+    Large change sets rebuild the snapshot from the database instead.
+    """
+    path = snapshot_path(user_id)
+    try:
+        snapshot = LedgerSnapshot(path)
+    except (OSError, SnapshotError):
+        return build_snapshot(db, user_id)
+
+    position_in_log = _log_position(db, user_id)
+    if position_in_log <= snapshot.since:
+        return snapshot
+
+    changes = db.query(TransactionChange.transaction_id, TransactionChange.op).filter(
+        TransactionChange.user_id == user_id,
+        TransactionChange.id > snapshot.since,
+        TransactionChange.id <= position_in_log,
+    ).all()
+    changed = {transaction_id for transaction_id, _ in changes}
+    fresh = sorted(_load_rows(db, user_id, changed), key=lambda row: (row[1], row[0]))
+    if len(fresh) > MAX_PATCHED_ROWS:
+        snapshot.close()
+        return build_snapshot(db, user_id)
+
+    # Copy the mapped columns as raw bytes; rows are never materialized
+    columns = []
+    for name, typecode in _COLUMNS:
+        column = array(typecode)
+        column.frombytes(getattr(snapshot, name).cast("B"))
+        columns.append(column)
+    snapshot.close()
+
+    if any(op != "create" for _, op in changes):
+        # Updates and deletes: find the old versions in one pass over the ids
+        stale = [i for i, id_ in enumerate(columns[0]) if id_ in changed]
+        for i in reversed(stale):
+            for column in columns:
+                del column[i]
+    ids, dates = columns[0], columns[1]
+    for row in fresh:
+        # New, later rows land at the end; out-of-order rows are inserted in place
+        lo = bisect.bisect_left(dates, row[1])
+        hi = bisect.bisect_right(dates, row[1], lo)
+        position = lo + bisect.bisect_left(ids[lo:hi], row[0])
+        if position < hi and ids[position] == row[0]:
+            continue  # created while the snapshot was built, already included
+        for column, value in zip(columns, row):
+            column.insert(position, value)
+    _write_columns(path, columns, position_in_log)
+    return LedgerSnapshot(path)
+
+
+class SnapshotCache:
+    """Keeps recently used snapshots mapped between requests."""
+
+    def __init__(self, max_open: int = 64) -> None:
+        self.max_open = max_open
+        self._open: "OrderedDict[int, LedgerSnapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int) -> LedgerSnapshot:
+        with self._lock:
+            snapshot = self._open.pop(user_id, None)
+        if snapshot is None or _log_position(db, user_id) > snapshot.since:
+            # Refreshing replaces the file; the old mapping stays valid for
+            # readers that still hold it and is released with the object
+            snapshot = refresh_snapshot(db, user_id)
+        with self._lock:
+            self._open[user_id] = snapshot
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        return snapshot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._open.clear()
+
+
+snapshot_cache = SnapshotCache()
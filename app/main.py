@@ -2,14 +2,13 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
-from app.api.endpoints import auth, transactions, categories
+from app.api.endpoints import auth, transactions, categories, analytics, stats
+from app.core.audit import audit_log
 from app.core.config import settings
+from app.core.ratelimit import RateLimitMiddleware, concurrency_limiter, rate_limiter
 from app.db.session import engine, SessionLocal
-from app.db.base import Base
 from app.db.init_db import init_db
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+from app.db.migrations import run_migrations
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -22,6 +21,16 @@ app = FastAPI(
 # Security scheme for Swagger UI
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
+# Admission control (added before CORS so that rejections still carry CORS headers)
+app.add_middleware(
+    RateLimitMiddleware,
+    limiter=rate_limiter,
+    concurrency=concurrency_limiter,
+    enabled=settings.RATE_LIMIT_ENABLED,
+    # The change feed waits on the event loop; don't let idle readers hold slots
+    exempt_paths=(f"{settings.API_V1_STR}/transactions/changes",),
+)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -51,15 +60,33 @@ app.include_router(
     prefix=f"{settings.API_V1_STR}/categories",
     tags=["categories"],
 )
+app.include_router(
+    analytics.router,
+    prefix=f"{settings.API_V1_STR}/analytics",
+    tags=["analytics"],
+)
+app.include_router(
+    stats.router,
+    prefix=f"{settings.API_V1_STR}/stats",
+    tags=["stats"],
+)
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database with default data on startup."""
-    db = SessionLocal()
-    try:
-        init_db(db)
-    finally:
-        db.close()
+    """Create or migrate the database tables and add default data, unless done ahead of time."""
+    if settings.MIGRATE_ON_STARTUP:
+        run_migrations(engine)
+        db = SessionLocal()
+        try:
+            init_db(db)
+        finally:
+            db.close()
+    audit_log.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Write out queued audit events before the worker exits."""
+    audit_log.stop()
 
 @app.get("/")
 def read_root():
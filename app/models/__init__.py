@@ -1,6 +1,20 @@
 from app.models.user import User
 from app.models.transaction import Transaction
 from app.models.category import Category
+from app.models.aggregate import CategoryBalance, MerchantTotal
+from app.models.idempotency import IdempotencyKey
+from app.models.change import TransactionChange
+from app.models.audit import AuditEvent
 
-# For type checking
-__all__ = ["User", "Transaction", "Category"] 
\ No newline at end of file
+# Importing any model imports this package first, so every mapped class is
+# registered before relationships are configured (standalone scripts included)
+__all__ = [
+    "User",
+    "Transaction",
+    "Category",
+    "CategoryBalance",
+    "MerchantTotal",
+    "IdempotencyKey",
+    "TransactionChange",
+    "AuditEvent",
+]
@@ -0,0 +1,34 @@
+from sqlalchemy import BigInteger, Column, Enum, ForeignKey, Integer, String, UniqueConstraint
+
+from app.db.base_class import Base
+from app.models.enums import TransactionType
+
+class CategoryBalance(Base):
+    """Running total of a user's transactions per category, month and type."""
+    __tablename__ = "category_balances"
+    __table_args__ = (
+        UniqueConstraint("user_id", "period", "type", "category_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    period = Column(String(7))  # YYYY-MM
+    type = Column(Enum(TransactionType))
+    category_id = Column(Integer, ForeignKey("categories.id"))
+    total_minor = Column(BigInteger, default=0)  # cents
+    count = Column(Integer, default=0)
+
+class MerchantTotal(Base):
+    """Running total of a user's transactions per normalized description."""
+    __tablename__ = "merchant_totals"
+    __table_args__ = (
+        UniqueConstraint("user_id", "period", "type", "merchant"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    period = Column(String(7))  # YYYY-MM
+    type = Column(Enum(TransactionType))
+    merchant = Column(String)
+    total_minor = Column(BigInteger, default=0)  # cents
+    count = Column(Integer, default=0)
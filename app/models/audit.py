@@ -0,0 +1,14 @@
+from sqlalchemy import Column, DateTime, Integer, String, Text
+
+from app.db.base_class import Base
+
+class AuditEvent(Base):
+    """Append-only audit trail of authentication and data mutations."""
+    __tablename__ = "audit_events"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, index=True)
+    action = Column(String(64), index=True)
+    user_id = Column(Integer, index=True)
+    subject = Column(String)  # e.g. the email used for a login attempt
+    details = Column(Text)  # JSON
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+class TransactionChange(Base):
+    """
+    Append-only log of transaction mutations, read by the change feed.
+
+    ``id`` is the sync position: it only grows, so it is monotonic for every
+    user. Deletes are recorded as tombstones (op="delete").
+    """
+    __tablename__ = "transaction_changes"
+    __table_args__ = (Index("ix_transaction_changes_user_seq", "user_id", "id"),)
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    transaction_id = Column(Integer, nullable=False)
+    op = Column(String(8), nullable=False)  # create, update or delete
+    created_at = Column(DateTime, default=func.now())
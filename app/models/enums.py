@@ -0,0 +1,6 @@
+import enum
+
+class TransactionType(str, enum.Enum):
+    """Shared by the SQLAlchemy models and the Pydantic schemas."""
+    income = "income"
+    expense = "expense"
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+class IdempotencyKey(Base):
+    """Response stored for a client-supplied Idempotency-Key."""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("user_id", "key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    key = Column(String(255))
+    fingerprint = Column(String(64))
+    status_code = Column(Integer)
+    response = Column(Text)
+    created_at = Column(DateTime, default=func.now(), index=True)
@@ -1,43 +0,0 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
-import enum
-
-from app.db.base_class import Base
-
-class TransactionType(str, enum.Enum):
-    INCOME = "income"
-    EXPENSE = "expense"
-
-class User(Base):
-    __tablename__ = "users"
-
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True)
-    hashed_password = Column(String)
-    full_name = Column(String)
-    transactions = relationship("Transaction", back_populates="owner")
-
-class Category(Base):
-    __tablename__ = "categories"
-
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, unique=True, index=True)
-    description = Column(String, nullable=True)
-    transactions = relationship("Transaction", back_populates="category")
-
-class Transaction(Base):
-    __tablename__ = "transactions"
-
-    id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float)
-    type = Column(Enum(TransactionType))
-    description = Column(String)
-    date = Column(DateTime, default=func.now())
-    currency = Column(String, default="USD")
-    
-    category_id = Column(Integer, ForeignKey("categories.id"))
-    user_id = Column(Integer, ForeignKey("users.id"))
-    
-    category = relationship("Category", back_populates="transactions")
-    owner = relationship("User", back_populates="transactions") 
\ No newline at end of file
@@ -1,22 +1,33 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum
+from decimal import Decimal
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey, DateTime, Enum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
+from app.core.money import from_minor, to_minor
 from app.db.base_class import Base
-from app.schemas.transaction import TransactionType
+from app.models.enums import TransactionType
 
 class Transaction(Base):
     __tablename__ = "transactions"
 
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float)
+    amount_minor = Column(BigInteger, nullable=False, default=0)  # cents
     type = Column(Enum(TransactionType))
     description = Column(String)
     date = Column(DateTime, default=func.now())
     currency = Column(String, default="USD")
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     category_id = Column(Integer, ForeignKey("categories.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
     
     owner = relationship("User", back_populates="transactions")
-    category = relationship("Category", back_populates="transactions") 
\ No newline at end of file
+    category = relationship("Category", back_populates="transactions")
+
+    @property
+    def amount(self) -> Decimal:
+        return from_minor(self.amount_minor or 0)
+
+    @amount.setter
+    def amount(self, value) -> None:
+        self.amount_minor = to_minor(value)
@@ -0,0 +1,38 @@
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+from pydantic import BaseModel
+
+from app.models.enums import TransactionType
+
+class TopCategory(BaseModel):
+    category_id: Optional[int]
+    name: Optional[str]
+    total: Decimal
+    count: int
+
+class TopMerchant(BaseModel):
+    merchant: str
+    total: Decimal
+    count: int
+
+class TopSpending(BaseModel):
+    period: Optional[str]
+    type: TransactionType
+    categories: List[TopCategory]
+    merchants: List[TopMerchant]
+
+class CategorySummary(BaseModel):
+    category_id: Optional[int]
+    income: Decimal
+    expense: Decimal
+    count: int
+
+class Summary(BaseModel):
+    start: Optional[date]
+    end: Optional[date]
+    count: int
+    income: Decimal
+    expense: Decimal
+    net: Decimal
+    categories: List[CategorySummary]
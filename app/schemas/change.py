@@ -0,0 +1,23 @@
+from enum import Enum
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+from app.schemas.transaction import Transaction
+
+class ChangeOp(str, Enum):
+    create = "create"
+    update = "update"
+    delete = "delete"
+
+class TransactionChange(BaseModel):
+    seq: int
+    op: ChangeOp
+    transaction_id: int
+    transaction: Optional[Transaction]  # None for deletes
+    changed_at: Optional[datetime]
+
+class ChangeFeed(BaseModel):
+    changes: List[TransactionChange]
+    next: str
+    has_more: bool
@@ -1,15 +1,15 @@
-from enum import Enum
-from pydantic import BaseModel
+from pydantic import BaseModel, condecimal
 from datetime import datetime
 from typing import Optional
+from app.models.enums import TransactionType
 from app.schemas.category import Category
 
-class TransactionType(str, Enum):
-    income = "income"
-    expense = "expense"
+# Amounts are exact to the cent and stored as integer minor units; 15 digits
+# keep the value in cents well inside a signed 64-bit column
+Money = condecimal(max_digits=15, decimal_places=2)
 
 class TransactionBase(BaseModel):
-    amount: float
+    amount: Money
     type: TransactionType
     description: str
     category_id: int
@@ -19,7 +19,7 @@ class TransactionCreate(TransactionBase):
     pass
 
 class TransactionUpdate(TransactionBase):
-    amount: Optional[float] = None
+    amount: Optional[Money] = None
     type: Optional[TransactionType] = None
     description: Optional[str] = None
     category_id: Optional[int] = None
@@ -0,0 +1,57 @@
+"""
+Worker boot benchmark.
+
+Starts fresh interpreters and measures, for each run:
+
+- import: time to ``import app.main`` (module import only, no DB access)
+- first request: import + app startup (migrations, default data) + ``GET /``
+
+Usage: python benchmarks/startup.py [--runs N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    assert client.get("/").status_code == 200
+    t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "first_request": t2 - t0}))
+"""
+
+def run_once(database_url: str) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "DATABASE_URL": database_url, "AUDIT_ENABLED": "false"}
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=root, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        run_once(database_url)  # create the schema; later runs measure a warm database
+        runs = [run_once(database_url) for _ in range(args.runs)]
+
+    for metric in ("import", "first_request"):
+        values = sorted(run[metric] * 1000 for run in runs)
+        print(
+            f"{metric:>14}: median {statistics.median(values):7.1f} ms"
+            f"  min {values[0]:7.1f} ms  max {values[-1]:7.1f} ms  ({len(values)} runs)"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import sys
+
+from sqlalchemy import case, func
+
+from app.db.migrations import run_migrations
+from app.db.session import SessionLocal, engine
+from app.db.snapshot import LedgerSnapshot, SnapshotError, build_snapshot, snapshot_path
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.models.enums import TransactionType
+
+def _user_ids(db, user_id):
+    if user_id is not None:
+        return [user_id]
+    return [id_ for (id_,) in db.query(User.id).order_by(User.id)]
+
+def build_snapshots(user_id=None):
+    db = SessionLocal()
+    try:
+        for id_ in _user_ids(db, user_id):
+            snapshot = build_snapshot(db, id_)
+            print(f"User {id_}: {snapshot.count} transactions -> {snapshot.path}")
+            snapshot.close()
+    finally:
+        db.close()
+
+def verify_snapshots(user_id=None) -> bool:
+    """Compare every snapshot's totals with the database."""
+    db = SessionLocal()
+    ok = True
+    try:
+        for id_ in _user_ids(db, user_id):
+            try:
+                snapshot = LedgerSnapshot(snapshot_path(id_))
+            except (OSError, SnapshotError) as exc:
+                print(f"User {id_}: MISSING ({exc})")
+                ok = False
+                continue
+            summary = snapshot.summary()
+            snapshot.close()
+            count, income = db.query(
+                func.count(Transaction.id),
+                func.coalesce(func.sum(case(
+                    (Transaction.type == TransactionType.income, Transaction.amount_minor), else_=0
+                )), 0),
+            ).filter(Transaction.user_id == id_).one()
+            total = db.query(func.coalesce(func.sum(Transaction.amount_minor), 0)).filter(
+                Transaction.user_id == id_
+            ).scalar()
+            expected = (count, income, total - income)
+            actual = (summary["count"], summary["income"], summary["expense"])
+            if actual == expected:
+                print(f"User {id_}: OK ({count} transactions)")
+            else:
+                print(f"User {id_}: MISMATCH snapshot={actual} database={expected}")
+                ok = False
+    finally:
+        db.close()
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or verify columnar ledger snapshots.")
+    parser.add_argument("command", choices=["build", "verify"])
+    parser.add_argument("--user", type=int, help="Only this user id (default: all users)")
+    args = parser.parse_args()
+    run_migrations(engine)
+    if args.command == "build":
+        build_snapshots(args.user)
+    elif not verify_snapshots(args.user):
+        sys.exit(1)
@@ -0,0 +1,183 @@
+"""
+Shared fixtures.
+
+Every pytest-xdist worker gets its own SQLite file, cloned with SQLite's
+backup API from a template that already holds the migrated schema; the
+template is built once per run and shared by all workers. Each test
+runs inside a transaction on a single connection that is rolled back
+afterwards; the sessions handed to the test and to the app work in a
+SAVEPOINT, so their commits and rollbacks behave as usual.
+"""
+import os
+import sys
+import uuid
+from pathlib import Path
+from typing import Generator
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Before the app is imported: settings are read once at import time
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from fastapi.testclient import TestClient
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.audit import NdjsonSink, audit_log
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.idempotency import idempotency_store
+from app.core.ratelimit import rate_limiter
+from app.db.migrations import run_migrations
+from app.db.session import get_db
+from app.db.snapshot import snapshot_cache
+from app.main import app
+from app.models.category import Category
+from app.schemas.user import UserCreate
+from tests.database import bind_sessions, build_once, clone_database, sqlite_engine
+
+
+def worker_id() -> str:
+    return os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+
+@pytest.fixture(scope="session")
+def shared_tmp_path(tmp_path_factory) -> Path:
+    """A temp directory shared by every xdist worker of this run."""
+    root = tmp_path_factory.getbasetemp()
+    return root if worker_id() == "main" else root.parent
+
+
+@pytest.fixture(scope="session")
+def template_db(shared_tmp_path) -> Path:
+    """An empty database with the current schema, built once per run."""
+    def build(path: Path) -> None:
+        engine = sqlite_engine(path)
+        run_migrations(engine)
+        engine.dispose()
+
+    return build_once(shared_tmp_path / "schema.db", build)
+
+
+@pytest.fixture(scope="session")
+def engine(template_db, tmp_path_factory) -> Generator[Engine, None, None]:
+    path = tmp_path_factory.mktemp("db") / f"test_{worker_id()}.db"
+    clone_database(template_db, path)
+    engine = sqlite_engine(path)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def isolate_side_effects(tmp_path_factory) -> Generator[None, None, None]:
+    """Write audit events and snapshots to the worker's temp dir."""
+    audit_dir = str(tmp_path_factory.mktemp("audit"))
+    audit_log.stop()
+    patch = pytest.MonkeyPatch()
+    patch.setattr(audit_log, "sink_factory", lambda: NdjsonSink(audit_dir))
+    patch.setattr(settings, "SNAPSHOT_DIR", str(tmp_path_factory.mktemp("snapshots")))
+    yield
+    audit_log.stop()
+    patch.undo()
+
+
+@pytest.fixture
+def session_factory(engine) -> Generator[sessionmaker, None, None]:
+    """Sessions for one test; everything they write is rolled back afterwards."""
+    connection = engine.connect()
+    transaction = connection.begin()
+    try:
+        yield bind_sessions(connection)
+    finally:
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(autouse=True)
+def override_get_db(session_factory) -> Generator[None, None, None]:
+    """Route the app's sessions into the test transaction and reset in-process caches."""
+    def _get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    for cache in (response_cache, idempotency_store, snapshot_cache):
+        cache.clear()
+    rate_limiter.reset()
+    app.dependency_overrides[get_db] = _get_db
+    yield
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture
+def db(session_factory) -> Generator[Session, None, None]:
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def test_user(client) -> dict:
+    """Create a test user and return user data with password."""
+    email = f"test_{uuid.uuid4()}@example.com"
+    password = "testpass123"
+
+    user_in = UserCreate(
+        email=email,
+        password=password,
+        full_name="Test User"
+    )
+
+    response = client.post("/auth/register", json=user_in.dict())
+    assert response.status_code == 200, f"Registration failed: {response.text}"
+
+    return {
+        "user": response.json(),
+        "email": email,
+        "password": password
+    }
+
+
+@pytest.fixture
+def auth_headers(client, test_user) -> dict:
+    """Get authentication headers for a test user."""
+    form_data = {
+        "username": test_user["email"],
+        "password": test_user["password"],
+        "grant_type": "password"
+    }
+
+    response = client.post(
+        "/auth/token",
+        data=form_data,
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+
+    assert response.status_code == 200, f"Login failed: {response.text}"
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def test_category(db: Session) -> Category:
+    """Create a test category."""
+    category = Category(
+        name=f"Test Category {uuid.uuid4()}",
+        description="Test category description"
+    )
+    db.add(category)
+    db.commit()
+    db.refresh(category)
+    return category
@@ -0,0 +1,68 @@
+"""SQLite helpers for isolated, transactional test databases."""
+import fcntl
+import sqlite3
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import sessionmaker
+
+
+def sqlite_engine(path: Path) -> Engine:
+    """Engine whose transactions can be nested with SAVEPOINTs."""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+    # pysqlite issues BEGIN lazily and breaks SAVEPOINT; let SQLAlchemy emit it
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+def clone_database(template: Path, target: Path) -> None:
+    """Copy a database page by page with SQLite's online backup API."""
+    source = sqlite3.connect(str(template))
+    destination = sqlite3.connect(str(target))
+    try:
+        source.backup(destination)
+    finally:
+        destination.close()
+        source.close()
+
+
+def build_once(path: Path, build: Callable[[Path], None]) -> Path:
+    """
+    Create ``path`` with ``build`` unless another process already did.
+
+    An exclusive lock makes concurrent pytest-xdist workers wait for the first
+    one; the file is built under a temporary name and renamed into place, so
+    a failed build is retried instead of being cloned half-written.
+    """
+    with open(path.with_suffix(".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not path.exists():
+            partial = path.with_suffix(".partial")
+            partial.unlink(missing_ok=True)
+            build(partial)
+            partial.replace(path)
+    return path
+
+
+def bind_sessions(connection: Connection) -> sessionmaker:
+    """Session factory whose sessions share ``connection`` and run inside a SAVEPOINT."""
+    factory = sessionmaker(bind=connection, autocommit=False, autoflush=False)
+    savepoint = connection.begin_nested()
+
+    @event.listens_for(factory, "after_transaction_end")
+    def _restart_savepoint(session, transaction):
+        nonlocal savepoint
+        if not savepoint.is_active:
+            savepoint = connection.begin_nested()
+
+    return factory
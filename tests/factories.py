@@ -0,0 +1,127 @@
+"""
+Bulk seeding helpers for the test and performance suites.
+
+Rows are generated deterministically from ``seed`` and written with
+executemany inserts, so seeding tens of thousands of transactions costs one
+statement per table instead of one ORM flush per row.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.security import get_password_hash
+from app.db.aggregates import rebuild_aggregates
+from app.db.init_db import init_db
+from app.models.category import Category
+from app.models.change import TransactionChange
+from app.models.enums import TransactionType
+from app.models.transaction import Transaction
+from app.models.user import User
+
+PASSWORD = "testpass123"
+
+INCOME_CATEGORIES = {"Salary", "Investments", "Gifts", "Other Income"}
+
+MERCHANTS: Dict[str, List[str]] = {
+    "Food & Dining": ["Whole Foods", "Trader Joe's", "Chipotle", "Starbucks", "Uber Eats"],
+    "Shopping": ["Amazon", "Target", "IKEA", "Best Buy"],
+    "Transportation": ["Shell", "Uber", "Lyft", "Metro Card"],
+    "Bills & Utilities": ["PG&E", "Comcast", "Verizon", "Water District"],
+    "Entertainment": ["Netflix", "Spotify", "Steam", "AMC Theatres"],
+    "Health": ["CVS Pharmacy", "Walgreens", "Dental Care"],
+    "Travel": ["Delta", "Airbnb", "Marriott"],
+    "Education": ["Coursera", "Bookshop"],
+    "Salary": ["Payroll"],
+    "Investments": ["Brokerage Dividend"],
+    "Gifts": ["Gift"],
+    "Other Income": ["Refund", "Cashback"],
+}
+
+
+def seed_categories(db: Session) -> Dict[str, int]:
+    """The default categories, as name -> id."""
+    init_db(db)
+    return {name: id_ for id_, name in db.query(Category.id, Category.name)}
+
+
+def seed_users(db: Session, count: int, password: str = PASSWORD) -> List[int]:
+    """Insert ``count`` active users sharing one password hash. Returns their ids."""
+    hashed = get_password_hash(password)
+    tag = uuid.uuid4().hex[:8]
+    emails = [f"user{i}_{tag}@example.com" for i in range(count)]
+    db.execute(
+        User.__table__.insert(),
+        [
+            {"email": email, "hashed_password": hashed, "full_name": f"User {i}", "is_active": True}
+            for i, email in enumerate(emails)
+        ],
+    )
+    ids = dict(db.query(User.email, User.id).filter(User.email.in_(emails)))
+    db.commit()
+    return [ids[email] for email in emails]
+
+
+def seed_transactions(
+    db: Session,
+    user_ids: List[int],
+    per_user: int,
+    start: datetime = datetime(2024, 1, 1),
+    days: int = 365,
+    seed: int = 0,
+    aggregates: bool = True,
+) -> int:
+    """
+    Insert ``per_user`` transactions for every user, with a change log entry each.
+
+    Each user is paid a salary on the first of the month; the remaining rows
+    are expenses spread over ``days`` with log-normally distributed amounts.
+    Aggregate tables are rebuilt afterwards unless ``aggregates`` is False.
+    Returns the number of transactions inserted.
+    """
+    rng = random.Random(seed)
+    categories = seed_categories(db)
+    expense_categories = [name for name in MERCHANTS if name not in INCOME_CATEGORIES]
+    next_id = (db.query(func.max(Transaction.id)).scalar() or 0) + 1
+
+    transactions = []
+    changes = []
+    for user_id in user_ids:
+        for n in range(per_user):
+            if n % 30 == 0:
+                category = "Salary"
+                date = start + timedelta(days=30 * (n // 30) % days)
+                amount_minor = rng.randrange(300000, 900000)
+                type_ = TransactionType.income
+            else:
+                category = rng.choice(expense_categories)
+                date = start + timedelta(seconds=rng.randrange(days * 24 * 60 * 60))
+                amount_minor = max(1, int(rng.lognormvariate(7.5, 1.0)))
+                type_ = TransactionType.expense
+            transactions.append(
+                {
+                    "id": next_id,
+                    "user_id": user_id,
+                    "category_id": categories[category],
+                    "type": type_,
+                    "amount_minor": amount_minor,
+                    "description": rng.choice(MERCHANTS[category]),
+                    "date": date,
+                    "currency": "USD",
+                    "updated_at": date,
+                }
+            )
+            changes.append(
+                {"user_id": user_id, "transaction_id": next_id, "op": "create", "created_at": date}
+            )
+            next_id += 1
+
+    db.execute(Transaction.__table__.insert(), transactions)
+    db.execute(TransactionChange.__table__.insert(), changes)
+    db.commit()
+    if aggregates:
+        rebuild_aggregates(db)
+    return len(transactions)
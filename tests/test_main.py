@@ -1,117 +1,22 @@
-import sys
 import os
-from pathlib import Path
+import sys
 import pytest
 from datetime import datetime
+from pathlib import Path
 import uuid
-from typing import Generator
 
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
-
-from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
-from app.main import app
 from app.db.base import Base
 from app.core.config import settings
-from app.models.category import Category
+from app.core.cache import MemoryBackend, ResponseCache
 from app.models.transaction import Transaction
 from app.models.user import User
-from app.core.security import get_password_hash
-from app.db.session import get_db
 from app.schemas.user import UserCreate
 
-# Test database setup
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Create all tables for each test
-@pytest.fixture(autouse=True)
-def setup_db():
-    Base.metadata.create_all(bind=engine)
-    yield
-    Base.metadata.drop_all(bind=engine)
-
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
-
-app.dependency_overrides[get_db] = override_get_db
-
-# Test client
-client = TestClient(app)
-
-@pytest.fixture
-def db() -> Generator[Session, None, None]:
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-@pytest.fixture
-def test_user() -> dict:
-    """Create a test user and return user data with password."""
-    email = f"test_{uuid.uuid4()}@example.com"
-    password = "testpass123"
-    
-    user_in = UserCreate(
-        email=email,
-        password=password,
-        full_name="Test User"
-    )
-    
-    response = client.post("/auth/register", json=user_in.dict())
-    assert response.status_code == 200, f"Registration failed: {response.text}"
-    
-    return {
-        "user": response.json(),
-        "email": email,
-        "password": password
-    }
-
-@pytest.fixture
-def auth_headers(test_user) -> dict:
-    """Get authentication headers for a test user."""
-    form_data = {
-        "username": test_user["email"],
-        "password": test_user["password"],
-        "grant_type": "password"
-    }
-    
-    response = client.post(
-        "/auth/token",
-        data=form_data,
-        headers={"Content-Type": "application/x-www-form-urlencoded"}
-    )
-    
-    assert response.status_code == 200, f"Login failed: {response.text}"
-    token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
-
-@pytest.fixture
-def test_category(db: Session) -> Category:
-    """Create a test category."""
-    category = Category(
-        name=f"Test Category {uuid.uuid4()}",
-        description="Test category description"
-    )
-    db.add(category)
-    db.commit()
-    db.refresh(category)
-    return category
-
-def test_read_main():
+def test_read_main(client):
     """Test the main endpoint."""
     response = client.get("/")
     assert response.status_code == 200
@@ -121,7 +26,7 @@ def test_read_main():
         "redoc": "/redoc"
     }
 
-def test_user_registration():
+def test_user_registration(client):
     """Test user registration process."""
     email = f"new_user_{uuid.uuid4()}@example.com"
     password = "testpass123"
@@ -139,7 +44,7 @@ def test_user_registration():
     assert data["email"] == email
     assert data["full_name"] == user_in.full_name
 
-def test_user_login(test_user):
+def test_user_login(client, test_user):
     """Test user login process."""
     form_data = {
         "username": test_user["email"],
@@ -158,7 +63,7 @@ def test_user_login(test_user):
     assert "access_token" in data
     assert data["token_type"] == "bearer"
 
-def test_create_transaction(db: Session, test_user, auth_headers, test_category):
+def test_create_transaction(client, db: Session, test_user, auth_headers, test_category):
     """Test creating a new transaction."""
     transaction_data = {
         "amount": 100.50,
@@ -181,19 +86,19 @@ def test_create_transaction(db: Session, test_user, auth_headers, test_category)
     assert data["description"] == transaction_data["description"]
     assert data["user_id"] == test_user["user"]["id"]
 
-def test_read_transactions(auth_headers):
+def test_read_transactions(client, auth_headers):
     """Test reading transactions list."""
     response = client.get("/api/v1/transactions/", headers=auth_headers)
     assert response.status_code == 200, f"Failed to read transactions: {response.text}"
     assert isinstance(response.json(), list)
 
-def test_read_categories(auth_headers):
+def test_read_categories(client, auth_headers):
     """Test reading categories list."""
     response = client.get("/api/v1/categories/", headers=auth_headers)
     assert response.status_code == 200, f"Failed to read categories: {response.text}"
     assert isinstance(response.json(), list)
 
-def test_transaction_summary(db: Session, test_user, auth_headers, test_category):
+def test_transaction_summary(client, db: Session, test_user, auth_headers, test_category):
     """Test transaction calculations."""
     transactions = [
         {
@@ -235,4 +140,779 @@ def test_transaction_summary(db: Session, test_user, auth_headers, test_category
     total_expenses = sum(float(t["amount"]) for t in transactions if t["type"] == "expense")
     
     assert total_income == 1000.00
-    assert total_expenses == 700.00
\ No newline at end of file
+    assert total_expenses == 700.00
+
+def test_transactions_etag(client, auth_headers, test_category):
+    """Test conditional requests and invalidation of the list cache."""
+    response = client.get("/api/v1/transactions/", headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = client.get(
+        "/api/v1/transactions/",
+        headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    response = client.post(
+        "/api/v1/transactions/",
+        json={
+            "amount": 12.5,
+            "type": "expense",
+            "description": "Coffee",
+            "category_id": test_category.id,
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    response = client.get(
+        "/api/v1/transactions/",
+        headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 1
+
+def test_response_cache_lru_and_shared_backend():
+    """Test the LRU bound and per-user invalidation through a shared backend."""
+    from starlette.requests import Request
+
+    def make_request(query: str) -> Request:
+        return Request({
+            "type": "http",
+            "method": "GET",
+            "path": "/api/v1/transactions/",
+            "query_string": query.encode(),
+            "headers": [],
+        })
+
+    cache = ResponseCache(max_entries=2)
+    for skip in range(3):
+        cache.put(cache.key_for(1, make_request(f"skip={skip}")), [skip])
+    assert cache.get(cache.key_for(1, make_request("skip=0"))) is None
+    assert cache.get(cache.key_for(1, make_request("skip=2"))).body == b"[2]"
+
+    backend = MemoryBackend()
+    worker_a = ResponseCache(backend=backend)
+    worker_b = ResponseCache(backend=backend)
+    worker_a.put(worker_a.key_for(1, make_request("limit=10")), [1])
+    worker_a.put(worker_a.key_for(2, make_request("limit=10")), [2])
+    assert worker_b.get(worker_b.key_for(1, make_request("limit=10"))).body == b"[1]"
+
+    worker_b.invalidate_user(1)
+    assert worker_a.get(worker_a.key_for(1, make_request("limit=10"))) is None
+    assert worker_a.get(worker_a.key_for(2, make_request("limit=10"))).body == b"[2]"
+
+    # A write between reading the rows and storing them must not resurrect them
+    key = cache.key_for(1, make_request("skip=0"))
+    cache.invalidate_user(1)
+    cache.put(key, ["stale"])
+    assert cache.get(cache.key_for(1, make_request("skip=0"))) is None
+
+def test_response_cache_ttl_without_backend():
+    """Test that workers without a shared backend stop serving each other's stale entries."""
+    import time
+    from starlette.requests import Request
+
+    request = Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/transactions/",
+        "query_string": b"limit=10",
+        "headers": [],
+    })
+    worker_a = ResponseCache(ttl_seconds=0.05)
+    worker_b = ResponseCache(ttl_seconds=0.05)
+    worker_a.put(worker_a.key_for(1, request), ["old"])
+    worker_b.put(worker_b.key_for(1, request), ["old"])
+
+    # The write lands on worker B; worker A cannot see the invalidation
+    worker_b.invalidate_user(1)
+    assert worker_b.get(worker_b.key_for(1, request)) is None
+    assert worker_a.get(worker_a.key_for(1, request)).body == b'["old"]'
+
+    time.sleep(0.06)
+    assert worker_a.get(worker_a.key_for(1, request)) is None
+
+def test_top_spending(client, auth_headers, test_category):
+    """Test that the top-N aggregates follow creates, updates and deletes."""
+    created = []
+    for amount, description in [(30.0, "Corner Cafe #12"), (20.0, "corner cafe #7"), (45.0, "Bookshop")]:
+        response = client.post(
+            "/api/v1/transactions/",
+            json={
+                "amount": amount,
+                "type": "expense",
+                "description": description,
+                "category_id": test_category.id,
+            },
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+        created.append(response.json())
+
+    client.put(f"/api/v1/transactions/{created[2]['id']}", json={"amount": 10.0}, headers=auth_headers)
+    client.delete(f"/api/v1/transactions/{created[1]['id']}", headers=auth_headers)
+
+    response = client.get("/api/v1/analytics/top", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert [(c["category_id"], c["total"], c["count"]) for c in data["categories"]] == [
+        (test_category.id, 40.0, 2)
+    ]
+    assert data["merchants"] == [
+        {"merchant": "corner cafe", "total": 30.0, "count": 1},
+        {"merchant": "bookshop", "total": 10.0, "count": 1},
+    ]
+
+    response = client.get("/api/v1/analytics/top?period=1999-01", headers=auth_headers)
+    assert response.json()["categories"] == []
+
+def test_normalize_description():
+    """Test that only reference numbers are stripped from merchant names."""
+    from app.db.aggregates import normalize_description
+
+    assert normalize_description("AMAZON #123 ") == "amazon"
+    assert normalize_description("Bus 42") == "bus"
+    assert normalize_description("SQ *Coffee") == "sq coffee"
+    assert normalize_description("7-Eleven") == "7-eleven"
+    assert normalize_description("Route 66 Diner") == "route 66 diner"
+    assert normalize_description(" 12345 ") == "12345"
+    assert normalize_description("#401") == "#401"
+
+def test_rebuild_aggregates(db: Session, test_category):
+    """Test the bulk backfill of the aggregate tables."""
+    from app.db.aggregates import rebuild_aggregates
+    from app.models.aggregate import CategoryBalance, MerchantTotal
+
+    user = User(email="rebuild@example.com", hashed_password="x", full_name="Rebuild")
+    db.add(user)
+    db.commit()
+    db.add_all([
+        Transaction(amount=5.0, type="expense", description="Bus 42", category_id=test_category.id,
+                    user_id=user.id, date=datetime(2024, 5, 1)),
+        Transaction(amount=7.0, type="expense", description="bus 17", category_id=test_category.id,
+                    user_id=user.id, date=datetime(2024, 5, 3)),
+        Transaction(amount=9.0, type="expense", description="Bus", category_id=test_category.id,
+                    user_id=user.id, date=datetime(2024, 6, 3)),
+    ])
+    db.commit()
+
+    assert rebuild_aggregates(db) == 3
+    balances = {b.period: (b.total_minor, b.count) for b in db.query(CategoryBalance).all()}
+    assert balances == {"2024-05": (1200, 2), "2024-06": (900, 1)}
+    merchants = {(m.period, m.merchant) for m in db.query(MerchantTotal).all()}
+    assert merchants == {("2024-05", "bus"), ("2024-06", "bus")}
+
+def test_aggregate_insert_race(db: Session, test_category, monkeypatch):
+    """Test that losing the race to create an aggregate row adds to the winner's row."""
+    from app.db import aggregates
+    from app.models.aggregate import CategoryBalance
+
+    user = User(email="race@example.com", hashed_password="x", full_name="Race")
+    db.add(user)
+    db.commit()
+    transaction = Transaction(amount=5, type="expense", description="Bus", category_id=test_category.id,
+                              user_id=user.id, date=datetime(2024, 5, 1))
+    db.add(transaction)
+    db.flush()
+
+    # The concurrent writer commits its first row between our UPDATE and INSERT
+    update = aggregates._update
+    misses = []
+
+    def racing_update(db, model, key, amount_minor, count):
+        if model is CategoryBalance and not misses:
+            misses.append(key)
+            db.execute(CategoryBalance.__table__.insert().values(**key, total_minor=300, count=1))
+            return 0
+        return update(db, model, key, amount_minor, count)
+
+    monkeypatch.setattr(aggregates, "_update", racing_update)
+    aggregates.apply_transaction(db, transaction)
+    db.commit()
+    balances = [(b.total_minor, b.count) for b in db.query(CategoryBalance).filter_by(user_id=user.id)]
+    assert balances == [(800, 2)]
+    assert db.query(Transaction).filter_by(user_id=user.id).count() == 1
+
+def test_money_arithmetic():
+    """Test fixed-point conversion and exact column sums."""
+    from decimal import Decimal
+    from app.core.money import column, from_minor, sum_minor, sum_where, to_minor
+
+    assert to_minor(0.1) == 10
+    assert to_minor("19.995") == 2000
+    assert to_minor(Decimal("-3.30")) == -330
+    assert from_minor(1005) == Decimal("10.05")
+
+    amounts = column(to_minor(0.1) for _ in range(100_000))
+    assert sum_minor(amounts) == 1_000_000
+    assert sum(0.1 for _ in range(100_000)) != 10_000.0
+    assert sum_where(column([100, 250, 75]), [1, 0, 1]) == 175
+
+def test_transaction_amount_is_exact(client, auth_headers, test_category):
+    """Test that amounts round-trip exactly and sub-cent precision is rejected."""
+    transaction_data = {
+        "amount": "0.10",
+        "type": "expense",
+        "description": "Candy",
+        "category_id": test_category.id,
+    }
+    for _ in range(3):
+        response = client.post("/api/v1/transactions/", json=transaction_data, headers=auth_headers)
+        assert response.status_code == 200, response.text
+
+    response = client.get("/api/v1/analytics/top", headers=auth_headers)
+    assert response.json()["categories"][0]["total"] == 0.3
+
+    response = client.post(
+        "/api/v1/transactions/",
+        json={**transaction_data, "amount": "0.001"},
+        headers=auth_headers
+    )
+    assert response.status_code == 422
+
+    response = client.post(
+        "/api/v1/transactions/",
+        json={**transaction_data, "amount": "100000000000000000000"},
+        headers=auth_headers
+    )
+    assert response.status_code == 422
+
+def test_model_registry():
+    """Test that there is one enum and one mapped class per table, and importing the app does no DB work."""
+    import subprocess
+    from app.models.enums import TransactionType
+    from app.schemas.transaction import TransactionType as SchemaTransactionType
+    import app.models
+
+    assert SchemaTransactionType is TransactionType
+    assert app.models.Transaction is Transaction
+    assert set(Base.metadata.tables) >= {"users", "categories", "transactions", "audit_events"}
+
+    probe = (
+        "from sqlalchemy import event; from app.db.session import engine; "
+        "event.listen(engine, 'connect', lambda *a: print('connected')); import app.main"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", probe], cwd=str(Path(__file__).parent.parent),
+        capture_output=True, text=True, check=True,
+    ).stdout
+    assert "connected" not in output
+
+def test_startup_can_skip_migrations(monkeypatch):
+    """Test that workers started with MIGRATE_ON_STARTUP=false run no DDL."""
+    import app.main
+
+    def fail(engine):
+        raise AssertionError("migrated in a worker")
+
+    monkeypatch.setattr(settings, "MIGRATE_ON_STARTUP", False)
+    monkeypatch.setattr(app.main, "run_migrations", fail)
+    with TestClient(app.main.app) as startup_client:
+        assert startup_client.get("/").status_code == 200
+
+def test_standalone_scripts(tmp_path):
+    """Test that the maintenance scripts configure the mappers on their own."""
+    import subprocess
+
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'scripts.db'}", "AUDIT_ENABLED": "false"}
+
+    def run(*command):
+        result = subprocess.run(
+            [sys.executable, *command], cwd=str(Path(__file__).parent.parent),
+            env=env, capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        return result.stdout
+
+    assert "initialized" in run("-m", "app.db.init")
+    assert "Name: Salary" in run("check_db.py")
+    run("manage_snapshots.py", "verify")
+
+def test_migrate_float_amounts():
+    """Test the migration of float amounts to integer minor units."""
+    from sqlalchemy import text
+    from app.db.migrations import run_migrations
+
+    legacy = create_engine("sqlite:///:memory:", poolclass=StaticPool)
+    with legacy.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE transactions (id INTEGER PRIMARY KEY, amount FLOAT, type VARCHAR(7), "
+            "description VARCHAR, date DATETIME, currency VARCHAR, category_id INTEGER, user_id INTEGER)"
+        ))
+        conn.execute(text(
+            "INSERT INTO transactions (amount, type, description, date, currency, category_id, user_id) "
+            "VALUES (19.99, 'EXPENSE', 'Book', '2024-01-05 10:00:00', 'USD', 1, 1)"
+        ))
+
+    run_migrations(legacy)
+    run_migrations(legacy)
+
+    session = sessionmaker(bind=legacy)()
+    transaction = session.query(Transaction).one()
+    assert transaction.amount_minor == 1999
+    assert str(transaction.amount) == "19.99"
+    assert transaction.type == "expense"
+
+    from app.models.aggregate import CategoryBalance
+    balances = [(b.period, b.total_minor, b.count) for b in session.query(CategoryBalance)]
+    assert balances == [("2024-01", 1999, 1)]
+
+def test_rebuild_aggregates_on_legacy_database(tmp_path):
+    """Test that the backfill command migrates a legacy database before rebuilding."""
+    import sqlite3
+    import subprocess
+
+    path = tmp_path / "legacy.db"
+    legacy = sqlite3.connect(str(path))
+    legacy.executescript(
+        "CREATE TABLE transactions (id INTEGER PRIMARY KEY, amount FLOAT, type VARCHAR(7), "
+        "description VARCHAR, date DATETIME, currency VARCHAR, category_id INTEGER, user_id INTEGER);"
+        "INSERT INTO transactions (amount, type, description, date, currency, category_id, user_id) "
+        "VALUES (19.99, 'EXPENSE', 'Book', '2024-01-05 10:00:00', 'USD', 1, 1);"
+    )
+    legacy.commit()
+    legacy.close()
+
+    result = subprocess.run(
+        [sys.executable, "-m", "app.db.init", "--rebuild-aggregates"],
+        cwd=str(Path(__file__).parent.parent),
+        env={**os.environ, "DATABASE_URL": f"sqlite:///{path}", "AUDIT_ENABLED": "false"},
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "Rebuilt aggregates from 1 transactions." in result.stdout
+    migrated = sqlite3.connect(str(path))
+    assert migrated.execute("SELECT total_minor, count FROM category_balances").fetchall() == [(1999, 1)]
+    migrated.close()
+
+def test_idempotent_transaction_create(client, auth_headers, test_category):
+    """Test that retries with the same Idempotency-Key don't create duplicates."""
+    from app.core.idempotency import idempotency_store
+
+    transaction_data = {
+        "amount": 42.0,
+        "type": "expense",
+        "description": "Retried request",
+        "category_id": test_category.id,
+    }
+    headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4())}
+
+    first = client.post("/api/v1/transactions/", json=transaction_data, headers=headers)
+    assert first.status_code == 200, first.text
+    replay = client.post("/api/v1/transactions/", json=transaction_data, headers=headers)
+    assert replay.status_code == 200
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == first.json()
+
+    # Replays survive a cold in-memory cache, e.g. on another worker
+    idempotency_store.clear()
+    replay = client.post("/api/v1/transactions/", json=transaction_data, headers=headers)
+    assert replay.json()["id"] == first.json()["id"]
+
+    response = client.get("/api/v1/transactions/", headers=auth_headers)
+    assert len(response.json()) == 1
+
+    conflict = client.post(
+        "/api/v1/transactions/",
+        json={**transaction_data, "amount": 43.0},
+        headers=headers
+    )
+    assert conflict.status_code == 422
+
+def test_idempotency_window_counts_from_creation(db: Session):
+    """Test that a key loaded from the table expires with its row, not a fresh TTL later."""
+    import time
+    from datetime import timedelta
+    from app.core.idempotency import IdempotencyStore
+    from app.models.idempotency import IdempotencyKey
+
+    store = IdempotencyStore(ttl_seconds=60)
+    db.add(IdempotencyKey(user_id=1, key="late", fingerprint="f", status_code=200, response="{}",
+                          created_at=datetime.utcnow() - timedelta(seconds=55)))
+    db.add(IdempotencyKey(user_id=1, key="expired", fingerprint="f", status_code=200, response="{}",
+                          created_at=datetime.utcnow() - timedelta(seconds=65)))
+    db.commit()
+
+    assert store.lookup(db, 1, "late", "f").headers["Idempotent-Replayed"] == "true"
+    assert store._get_local(1, "late").expires_at < time.time() + 6
+    assert store.lookup(db, 1, "expired", "f") is None
+
+def test_idempotent_transaction_update(client, auth_headers, test_category):
+    """Test Idempotency-Key support on updates."""
+    response = client.post(
+        "/api/v1/transactions/",
+        json={"amount": 5.0, "type": "expense", "description": "Tea", "category_id": test_category.id},
+        headers=auth_headers
+    )
+    transaction_id = response.json()["id"]
+    headers = {**auth_headers, "Idempotency-Key": str(uuid.uuid4())}
+
+    first = client.put(f"/api/v1/transactions/{transaction_id}", json={"amount": 6.0}, headers=headers)
+    assert first.status_code == 200, first.text
+    assert float(first.json()["amount"]) == 6.0
+    replay = client.put(f"/api/v1/transactions/{transaction_id}", json={"amount": 6.0}, headers=headers)
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == first.json()
+
+def test_rate_limit_middleware():
+    """Test 429/503 admission control on a minimal app."""
+    from fastapi import FastAPI
+    from app.api.deps import create_access_token
+    from app.core.ratelimit import ConcurrencyLimiter, RateLimiter, RateLimitMiddleware
+
+    limiter = RateLimiter(
+        user_limit=(1.0, 2),
+        ip_limit=(100.0, 100),
+        routes={"POST /slow": (0.5, 1)},
+    )
+    concurrency = ConcurrencyLimiter(limit=1)
+    mini = FastAPI()
+    mini.add_middleware(RateLimitMiddleware, limiter=limiter, concurrency=concurrency)
+
+    @mini.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    @mini.post("/slow")
+    def slow():
+        return {"ok": True}
+
+    mini_client = TestClient(mini)
+    alice = {"Authorization": f"Bearer {create_access_token({'sub': 'alice@example.com'})}"}
+    bob = {"Authorization": f"Bearer {create_access_token({'sub': 'bob@example.com'})}"}
+
+    assert mini_client.get("/ping", headers=alice).status_code == 200
+    assert mini_client.get("/ping", headers=alice).status_code == 200
+    response = mini_client.get("/ping", headers=alice)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    # Other users and per-route buckets are independent
+    assert mini_client.get("/ping", headers=bob).status_code == 200
+    assert mini_client.post("/slow", headers=alice).status_code == 200
+    assert mini_client.post("/slow", headers=alice).status_code == 429
+
+    assert limiter.stats()["rejected"] == {"user": 2}
+
+    concurrency.in_flight = 1  # simulate a request that is still running
+    response = mini_client.get("/ping", headers=bob)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert concurrency.stats()["shed"] == 1
+
+def test_rate_limit_stats(client, test_user, auth_headers, monkeypatch):
+    """Test the rate limiter statistics endpoint, which is for admins only."""
+    response = client.get("/api/v1/stats/ratelimit", headers=auth_headers)
+    assert response.status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [test_user["email"]])
+    response = client.get("/api/v1/stats/ratelimit", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["rate_limit"]["allowed"] > 0
+    assert data["concurrency"]["in_flight"] == 1
+
+def test_transaction_change_feed(client, auth_headers, test_category):
+    """Test incremental sync through the change feed."""
+    response = client.get("/api/v1/transactions/changes", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["changes"] == []
+    token = response.json()["next"]
+
+    created = []
+    for description in ["Lunch", "Dinner"]:
+        response = client.post(
+            "/api/v1/transactions/",
+            json={"amount": 10.0, "type": "expense", "description": description,
+                  "category_id": test_category.id},
+            headers=auth_headers
+        )
+        created.append(response.json()["id"])
+
+    response = client.get(f"/api/v1/transactions/changes?since={token}", headers=auth_headers)
+    feed = response.json()
+    assert [(c["op"], c["transaction_id"]) for c in feed["changes"]] == [
+        ("create", created[0]), ("create", created[1])
+    ]
+    assert feed["changes"][0]["transaction"]["description"] == "Lunch"
+    token = feed["next"]
+
+    client.put(f"/api/v1/transactions/{created[0]}", json={"description": "Brunch"}, headers=auth_headers)
+    client.delete(f"/api/v1/transactions/{created[1]}", headers=auth_headers)
+
+    response = client.get(f"/api/v1/transactions/changes?since={token}", headers=auth_headers)
+    changes = response.json()["changes"]
+    assert [(c["op"], c["transaction_id"]) for c in changes] == [
+        ("update", created[0]), ("delete", created[1])
+    ]
+    assert changes[0]["transaction"]["description"] == "Brunch"
+    assert changes[1]["transaction"] is None
+
+    # Long-poll times out with an empty page and the same token
+    token = response.json()["next"]
+    response = client.get(f"/api/v1/transactions/changes?since={token}&wait=0.2", headers=auth_headers)
+    assert response.json() == {"changes": [], "next": token, "has_more": False}
+
+    response = client.get("/api/v1/transactions/changes?since=abc", headers=auth_headers)
+    assert response.status_code == 400
+
+def test_transaction_change_stream(client, auth_headers, test_category):
+    """Test the Server-Sent Events mode of the change feed."""
+    client.post(
+        "/api/v1/transactions/",
+        json={"amount": 3.0, "type": "expense", "description": "Snack", "category_id": test_category.id},
+        headers=auth_headers
+    )
+    response = client.get(
+        "/api/v1/transactions/changes?wait=0.1",
+        headers={**auth_headers, "Accept": "text/event-stream"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: change" in response.text
+    assert '"description": "Snack"' in response.text
+
+def test_change_notifier_wakes_waiters():
+    """Test that a notification wakes up a long-poll waiter."""
+    import threading
+    from app.core.changefeed import ChangeNotifier
+
+    notifier = ChangeNotifier(poll_interval=5.0)
+    seen = notifier.version(7)
+    threading.Timer(0.05, notifier.notify, args=(7,)).start()
+    assert notifier.wait(7, seen, timeout=5.0)
+    assert not notifier.wait(7, notifier.version(7), timeout=0.05)
+
+    async def wait_async():
+        seen = notifier.version(7)
+        threading.Timer(0.05, notifier.notify, args=(7,)).start()
+        woken = await notifier.wait_async(7, seen, timeout=5.0)
+        return woken, await notifier.wait_async(7, notifier.version(7), timeout=0.05)
+
+    import asyncio
+    assert asyncio.run(wait_async()) == (True, False)
+    assert not notifier._async_waiters
+
+def test_change_feed_does_not_take_concurrency_slots(client, auth_headers, monkeypatch):
+    """Test that idle change feed readers can't starve other requests of slots."""
+    from app.core.ratelimit import concurrency_limiter
+
+    monkeypatch.setattr(concurrency_limiter, "in_flight", concurrency_limiter.limit)
+    response = client.get("/api/v1/transactions/changes?wait=0.1", headers=auth_headers)
+    assert response.status_code == 200
+    assert client.get("/api/v1/transactions/", headers=auth_headers).status_code == 503
+
+class ListSink:
+    """Audit sink that keeps batches in memory."""
+
+    def __init__(self):
+        self.batches = []
+
+    def write(self, events):
+        self.batches.append(list(events))
+
+    def close(self):
+        pass
+
+def test_audit_log_batches_and_flushes():
+    """Test batching, flush and flush-on-stop of the audit writer."""
+    from app.core.audit import AuditLog
+
+    sink = ListSink()
+    audit = AuditLog(lambda: sink, batch_size=10, flush_interval=0.05)
+    for i in range(25):
+        assert audit.record("transaction.create", user_id=1, transaction_id=i)
+    assert audit.flush(timeout=5)
+    events = [event for batch in sink.batches for event in batch]
+    assert [event["details"]["transaction_id"] for event in events] == list(range(25))
+    assert all(len(batch) <= 10 for batch in sink.batches)
+
+    audit.record("auth.login", user_id=1)
+    audit.stop()
+    stats = audit.stats()
+    assert stats["written"] == 26
+    assert stats["dropped"] == 0
+    assert stats["running"] is False
+
+def test_audit_log_backpressure():
+    """Test the drop policies when the writer can't keep up."""
+    import threading
+    import time
+    from app.core.audit import AuditLog
+
+    release = threading.Event()
+
+    class SlowSink(ListSink):
+        def write(self, events):
+            release.wait(5)
+            super().write(events)
+
+    def wait_until_picked_up(audit):
+        deadline = time.monotonic() + 5
+        while audit.stats()["queue_depth"]:
+            if time.monotonic() > deadline:
+                pytest.fail("audit writer never picked up the first event")
+            time.sleep(0.001)
+
+    for policy, kept in [("drop_new", [0, 1]), ("drop_oldest", [0, 3])]:
+        release.clear()
+        sink = SlowSink()
+        audit = AuditLog(lambda: sink, max_queue=1, batch_size=1, flush_interval=0, policy=policy)
+        audit.record("event", n=0)
+        wait_until_picked_up(audit)  # writer picked up event 0 and is stuck
+        for n in range(1, 4):
+            audit.record("event", n=n)
+        release.set()
+        audit.stop()
+        written = [event["details"]["n"] for batch in sink.batches for event in batch]
+        assert written == kept, policy
+        assert audit.stats()["dropped"] == 2
+
+    # "block" waits in request threads, but never on an event loop
+    import asyncio
+    import time
+    release.clear()
+    audit = AuditLog(SlowSink, max_queue=1, batch_size=1, flush_interval=0, block_timeout=5)
+    audit.record("event", n=0)
+    wait_until_picked_up(audit)
+    audit.record("event", n=1)
+
+    async def record_on_loop():
+        return audit.record("event", n=2)
+
+    started = time.monotonic()
+    assert asyncio.run(record_on_loop()) is False
+    assert time.monotonic() - started < 1
+    release.set()
+    audit.stop()
+
+def test_audit_ndjson_segments(tmp_path):
+    """Test that the NDJSON sink rotates append-only segment files."""
+    import json
+    from app.core.audit import NdjsonSink
+
+    sink = NdjsonSink(str(tmp_path), segment_bytes=200)
+    for i in range(5):
+        sink.write([{"action": "auth.login", "user_id": i, "details": {"padding": "x" * 100}}])
+    sink.close()
+    segments = sorted(tmp_path.iterdir())
+    assert len(segments) > 1
+    lines = [json.loads(line) for segment in segments for line in segment.read_text().splitlines()]
+    assert sorted(line["user_id"] for line in lines) == list(range(5))
+
+def test_login_is_audited(client, test_user, auth_headers, monkeypatch):
+    """Test that logins are queued for auditing and exposed in the admin stats."""
+    response = client.get("/api/v1/stats/audit", headers=auth_headers)
+    assert response.status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [test_user["email"]])
+    response = client.get("/api/v1/stats/audit", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["enqueued"] >= 2  # registration and login
+
+def test_ledger_snapshot_refresh(db: Session, test_category, tmp_path, monkeypatch):
+    """Test incremental snapshot refreshes against the change log."""
+    from app.db.changes import record_change
+    from app.db.snapshot import build_snapshot, refresh_snapshot
+
+    monkeypatch.setattr(settings, "SNAPSHOT_DIR", str(tmp_path))
+    user = User(email="snapshot@example.com", hashed_password="x", full_name="Snapshot")
+    db.add(user)
+    db.commit()
+
+    def add(amount, type_, day):
+        transaction = Transaction(amount=amount, type=type_, description="t", category_id=test_category.id,
+                                  user_id=user.id, date=datetime(2024, 1, day))
+        db.add(transaction)
+        db.flush()
+        record_change(db, transaction, "create")
+        db.commit()
+        return transaction
+
+    add(100, "income", 1)
+    add(30, "expense", 5)
+    snapshot = build_snapshot(db, user.id)
+    assert snapshot.summary()["income"] == 10000
+    assert snapshot.summary()["expense"] == 3000
+    snapshot.close()
+
+    late = add(20, "expense", 20)  # append
+    early = add(5, "expense", 2)  # out of order insert
+    snapshot = refresh_snapshot(db, user.id)
+    assert list(snapshot.dates) == sorted(snapshot.dates)
+    assert snapshot.summary()["expense"] == 5500
+    assert snapshot.summary(datetime(2024, 1, 2), datetime(2024, 1, 6))["expense"] == 3500
+    assert snapshot.summary(datetime(2024, 1, 6), datetime(2024, 1, 2))["count"] == 0
+    snapshot.close()
+
+    early.amount = 7
+    record_change(db, early, "update")
+    record_change(db, late, "delete")
+    db.delete(late)
+    db.commit()
+    snapshot = refresh_snapshot(db, user.id)
+    summary = snapshot.summary()
+    assert (summary["count"], summary["income"], summary["expense"]) == (3, 10000, 3700)
+    assert summary["categories"] == {test_category.id: [10000, 3700, 3]}
+    snapshot.close()
+
+    # A row created while the snapshot was being built is in both the file and the log
+    from app.db.snapshot import _write, snapshot_path
+    raced = add(1, "expense", 25)
+    snapshot = build_snapshot(db, user.id)
+    rows, since = list(snapshot.rows()), snapshot.since
+    snapshot.close()
+    _write(snapshot_path(user.id), rows, since - 1)
+    snapshot = refresh_snapshot(db, user.id)
+    assert list(snapshot.ids).count(raced.id) == 1
+    assert snapshot.count == 4
+    snapshot.close()
+
+def test_summary_endpoint(client, auth_headers, test_category, tmp_path, monkeypatch):
+    """Test the snapshot-backed summary endpoint."""
+    from app.db.snapshot import snapshot_cache
+
+    monkeypatch.setattr(settings, "SNAPSHOT_DIR", str(tmp_path))
+    snapshot_cache.clear()
+    for amount, type_ in [("1000.00", "income"), ("250.10", "expense"), ("49.90", "expense")]:
+        client.post(
+            "/api/v1/transactions/",
+            json={"amount": amount, "type": type_, "description": "x", "category_id": test_category.id},
+            headers=auth_headers
+        )
+        response = client.get("/api/v1/analytics/summary", headers=auth_headers)
+        assert response.status_code == 200, response.text
+
+    data = response.json()
+    assert (data["count"], data["income"], data["expense"], data["net"]) == (3, 1000.0, 300.0, 700.0)
+    assert data["categories"] == [
+        {"category_id": test_category.id, "income": 1000.0, "expense": 300.0, "count": 3}
+    ]
+
+    response = client.get("/api/v1/analytics/summary?end=2000-01-01", headers=auth_headers)
+    assert response.json()["count"] == 0
+    response = client.get("/api/v1/analytics/summary?end=9999-12-31", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["count"] == 3
+    response = client.get("/api/v1/analytics/summary?start=2030-01-01&end=2020-01-01", headers=auth_headers)
+    assert response.status_code == 400
+    snapshot_cache.clear()
+
+def test_tests_are_rolled_back(db: Session, session_factory):
+    """Test that each test starts empty and that a failed write only undoes itself."""
+    from sqlalchemy.exc import IntegrityError
+
+    assert db.query(User).count() == 0
+    assert db.query(Transaction).count() == 0
+
+    db.add(User(email="kept@example.com", hashed_password="x"))
+    db.commit()
+    other = session_factory()
+    other.add(User(email="kept@example.com", hashed_password="x"))
+    with pytest.raises(IntegrityError):
+        other.commit()
+    other.rollback()
+    assert [u.email for u in other.query(User)] == ["kept@example.com"]
+    other.close()
@@ -0,0 +1,128 @@
+"""
+Performance suite: the read paths against a bulk-seeded ledger.
+
+The ledger is seeded once per run into a copy of the schema template and
+cloned again for this module on every worker, so each test still runs in a
+rolled-back transaction. Run it alone with ``pytest -m perf --durations=0``.
+"""
+from typing import Generator
+
+import pytest
+from sqlalchemy import case, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import create_access_token
+from app.core.money import from_minor
+from app.models.enums import TransactionType
+from app.models.transaction import Transaction
+from app.models.user import User
+from tests.database import build_once, clone_database, sqlite_engine
+from tests.factories import seed_transactions, seed_users
+
+pytestmark = pytest.mark.perf
+
+USERS = 20
+PER_USER = 1000
+
+
+@pytest.fixture(scope="module")
+def seeded_db(template_db, shared_tmp_path):
+    def build(path):
+        clone_database(template_db, path)
+        engine = sqlite_engine(path)
+        db = sessionmaker(bind=engine)()
+        try:
+            seed_transactions(db, seed_users(db, USERS), PER_USER)
+        finally:
+            db.close()
+            engine.dispose()
+
+    return build_once(shared_tmp_path / "ledger.db", build)
+
+
+@pytest.fixture(scope="module")
+def engine(seeded_db, tmp_path_factory) -> Generator[Engine, None, None]:
+    path = tmp_path_factory.mktemp("perf") / "test.db"
+    clone_database(seeded_db, path)
+    engine = sqlite_engine(path)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def user(db) -> User:
+    return db.query(User).order_by(User.id).first()
+
+
+@pytest.fixture
+def headers(user) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}
+
+
+def test_seeded_ledger(db):
+    """Test that every user got a full ledger."""
+    counts = dict(db.query(Transaction.user_id, func.count()).group_by(Transaction.user_id))
+    assert len(counts) == USERS
+    assert set(counts.values()) == {PER_USER}
+
+
+def test_list_transactions(client, headers):
+    """Test paging through a full ledger, newest first."""
+    seen = []
+    for skip in range(0, PER_USER, 100):
+        response = client.get(f"/api/v1/transactions/?skip={skip}&limit=100", headers=headers)
+        assert response.status_code == 200, response.text
+        seen.extend(response.json())
+    assert len({t["id"] for t in seen}) == PER_USER
+    assert [t["date"] for t in seen] == sorted((t["date"] for t in seen), reverse=True)
+
+
+def test_top_spending(client, db, user, headers):
+    """Test that the aggregate-backed top categories match a full scan."""
+    response = client.get("/api/v1/analytics/top?limit=50", headers=headers)
+    assert response.status_code == 200, response.text
+    expected = dict(
+        db.query(Transaction.category_id, func.sum(Transaction.amount_minor))
+        .filter(Transaction.user_id == user.id, Transaction.type == TransactionType.expense)
+        .group_by(Transaction.category_id)
+    )
+    assert {c["category_id"]: c["total"] for c in response.json()["categories"]} == {
+        category_id: float(from_minor(total)) for category_id, total in expected.items()
+    }
+
+
+def test_summary(client, db, user, headers, tmp_path, monkeypatch):
+    """Test the snapshot-backed summary, cold and warm, against a full scan."""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "SNAPSHOT_DIR", str(tmp_path))
+    income, total = (
+        db.query(
+            func.sum(case((Transaction.type == TransactionType.income, Transaction.amount_minor), else_=0)),
+            func.sum(Transaction.amount_minor),
+        )
+        .filter(Transaction.user_id == user.id)
+        .one()
+    )
+    for _ in range(2):
+        response = client.get("/api/v1/analytics/summary", headers=headers)
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["count"] == PER_USER
+        assert data["income"] == float(from_minor(income))
+        assert data["expense"] == float(from_minor(total - income))
+
+
+def test_change_feed_catch_up(client, headers):
+    """Test a client syncing a full ledger from scratch through the change feed."""
+    since, synced = "0", set()
+    while True:
+        response = client.get(f"/api/v1/transactions/changes?since={since}&limit=1000", headers=headers)
+        assert response.status_code == 200, response.text
+        feed = response.json()
+        synced.update(c["transaction_id"] for c in feed["changes"])
+        since = feed["next"]
+        if not feed["has_more"]:
+            break
+    assert len(synced) == PER_USER